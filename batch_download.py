@@ -11,21 +11,89 @@ Usage:
 
 import argparse
 import asyncio
+import logging
+import mmap
+import queue
+import random
+import re
 import sys
+from collections import Counter, defaultdict, deque
+from collections.abc import Iterator
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
+from urllib.parse import urlparse
 
-# Import from the enhanced downloader (which is now fixed)
-from tv_downloader_enhanced import EnhancedTVScraper
+# Import from the enhanced downloader (which is now fixed). Its Playwright
+# names are bound lazily when the first scraper is created, so they're
+# read through the module (tv_downloader_enhanced.PlaywrightError)
+import tv_downloader_enhanced
+from tv_downloader_enhanced import BloomFilter, EnhancedTVScraper, ListingUnavailableError
+
+
+# Progress goes through a queue so concurrent workers never block on stdout;
+# main() attaches the listener that does the actual writing
+logger = logging.getLogger("batch")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Script pages open at once per site, split across that site's lanes
+# (one lane alone gets the scraper's usual 4)
+PAGES_PER_SITE = 4
+
+# Hosts accepted from URL files (exact match, not substring)
+ALLOWED_HOSTS = frozenset({'tradingview.com', 'www.tradingview.com'})
+
+# A whole line holding one http(s) URL; group 2 is the host. Comment lines
+# never match because they don't start with the scheme.
+_URL_LINE = re.compile(rb'^[ \t]*(https?://([^/\s]+)\S*)[ \t]*\r?$', re.MULTILINE)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit: +1 after a run of successes, halved on error."""
+
+    def __init__(self, initial: int, maximum: int, increase_after: int = 3):
+        self.limit = max(1, min(initial, maximum))
+        self.maximum = maximum
+        self.increase_after = increase_after
+        self.active = 0
+        self._successes = 0
+        self._cond = asyncio.Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release_ok(self):
+        async with self._cond:
+            self.active -= 1
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                logger.info(f"Concurrency raised to {self.limit}")
+            self._cond.notify_all()
+
+    async def release_err(self):
+        async with self._cond:
+            self.active -= 1
+            self._successes = 0
+            if self.limit > 1:
+                self.limit = max(1, self.limit // 2)
+                logger.warning(f"Concurrency lowered to {self.limit}")
+            self._cond.notify_all()
 
 
 async def batch_download(urls: list[str], output_dir: str = "./pinescript_downloads", 
-                        delay: float = 2.0, max_pages: int = 10):
-    """Download from multiple URLs sequentially."""
+                        delay: float = 2.0, max_pages: int = 10, max_concurrency: int = 4,
+                        deny_cache: str | None = None, per_url_timeout: float = 600.0,
+                        retries: int = 3):
+    """Download from multiple URLs concurrently (starts on one host spaced `delay` apart, adaptive concurrency up to max_concurrency)."""
     
-    print(f"\n{'='*70}")
-    print(f"  BATCH DOWNLOAD")
-    print(f"  Processing {len(urls)} URLs")
-    print(f"{'='*70}\n")
+    logger.info(f"\n{'='*70}")
+    logger.info(f"  BATCH DOWNLOAD")
+    logger.info(f"  Processing {len(urls)} URLs (up to {max_concurrency} at a time)")
+    logger.info(f"{'='*70}\n")
     
     total_stats = {
         'downloaded': 0,
@@ -33,56 +101,168 @@ async def batch_download(urls: list[str], output_dir: str = "./pinescript_downlo
         'failed': 0
     }
     
+    # Skip URLs that failed permanently in an earlier run
+    deny_path = Path(deny_cache) if deny_cache else None
+    deny = BloomFilter.load(deny_path) if deny_path else None
+    if deny is not None:
+        allowed = [u for u in urls if u not in deny]
+        if len(allowed) < len(urls):
+            logger.info(f"Skipping {len(urls) - len(allowed)} URLs listed in deny cache\n")
+        total_stats['skipped'] += len(urls) - len(allowed)
+        urls = allowed
+    
+    # Scan the output tree once; workers share and update this set in memory
+    # instead of each one re-checking the disk ({script_id}_{title}.pine[.zst])
+    known_ids = {p.name.split('_', 1)[0]
+                 for pattern in ('*/*.pine', '*/*.pine.zst')
+                 for p in Path(output_dir).glob(pattern)}
+    
+    # Group by site (www. and bare host are the same one). Several URLs of a
+    # site may run at once, but their starts are spaced `delay` apart so
+    # per-site pacing stays polite
+    by_host: dict[str, deque[tuple[int, str]]] = defaultdict(deque)
     for i, url in enumerate(urls, 1):
-        print(f"\n[{i}/{len(urls)}] Processing: {url}\n")
-        print("-" * 70)
-        
-        scraper = EnhancedTVScraper(
-            output_dir=output_dir,
-            headless=True
-        )
-        
+        by_host[urlparse(url).netloc.lower().removeprefix('www.')].append((i, url))
+    next_start: dict[str, float] = defaultdict(float)
+    host_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+    
+    # Start at half the cap and let AIMD find the level the site tolerates
+    limiter = AdaptiveLimiter(initial=max(1, max_concurrency // 2), maximum=max_concurrency)
+    retries = max(1, retries)
+    errors = Counter()  # URL-level failure categories
+    
+    def add_run_stats(stats: dict):
+        # Single event loop, so no locking needed
+        total_stats['downloaded'] += stats['downloaded']
+        total_stats['skipped'] += (stats['skipped_protected'] + stats['skipped_no_code']
+                                   + stats['skipped_duplicate'])
+        total_stats['failed'] += stats['failed']
+    
+    async def run_url(scraper: EnhancedTVScraper, url: str) -> bool:
+        """Download one URL, retrying transient failures with exponential backoff.
+        Returns False if the site looked unhealthy (timeouts/browser errors)."""
+        for attempt in range(1, retries + 1):
+            try:
+                # Launched lazily so launch failures are retried like any other
+                if scraper.browser is None:
+                    await scraper.setup()
+                # download_all counts per run; every attempt's counts are summed
+                scraper.reset_stats()
+                try:
+                    await asyncio.wait_for(
+                        scraper.download_all(
+                            base_url=url,
+                            max_pages=max_pages,
+                            delay=delay,
+                            resume=True
+                        ),
+                        timeout=per_url_timeout
+                    )
+                finally:
+                    add_run_stats(scraper.stats)
+                return True
+            except ListingUnavailableError as e:
+                # Permanent: retrying won't help
+                logger.error(f"Error processing {url}: {e}")
+                total_stats['failed'] += 1
+                errors['unavailable'] += 1
+                if deny is not None:
+                    deny.add(url)
+                    deny.save(deny_path)
+                return True
+            except (asyncio.TimeoutError, tv_downloader_enhanced.PlaywrightError) as e:
+                is_timeout = isinstance(e, asyncio.TimeoutError)
+                reason = f"timeout after {per_url_timeout:.0f}s" if is_timeout else str(e)[:100]
+                # The page or browser may be wedged; release it and start clean
+                await scraper.cleanup()
+                if attempt == retries:
+                    logger.error(f"Giving up on {url} after {retries} attempts: {reason}")
+                    total_stats['failed'] += 1
+                    errors['timeout' if is_timeout else 'browser'] += 1
+                    return False
+                wait = min(10.0, 2 ** (attempt - 1)) + random.uniform(0, 1)
+                logger.warning(f"Attempt {attempt}/{retries} failed for {url} ({reason}), retrying in {wait:.1f}s")
+                await asyncio.sleep(wait)
+            except Exception as e:
+                logger.error(f"Error processing {url}: {e}")
+                total_stats['failed'] += 1
+                errors['other'] += 1
+                return True
+        return True
+    
+    async def pace(host: str):
+        """Wait until the next URL on this site may start, then book the one after."""
+        loop = asyncio.get_running_loop()
+        async with host_locks[host]:
+            wait = next_start[host] - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            next_start[host] = loop.time() + random.uniform(delay, delay * 1.5)
+    
+    async def host_worker(host: str, items: deque[tuple[int, str]], pages: int):
+        # One warm browser per lane, reused for every URL it takes from the
+        # site's queue. The finally also runs on cancellation (Ctrl-C), so
+        # Chromium never leaks.
+        scraper = EnhancedTVScraper(output_dir=output_dir, headless=True,
+                                    known_ids=known_ids, concurrency=pages)
         try:
-            await scraper.download_all(
-                base_url=url,
-                max_pages=max_pages,
-                delay=delay,
-                resume=True
-            )
-            
-            total_stats['downloaded'] += scraper.stats['downloaded']
-            total_stats['skipped'] += scraper.stats['skipped_protected'] + scraper.stats['skipped_no_code']
-            total_stats['failed'] += scraper.stats['failed']
-            
-        except Exception as e:
-            print(f"Error processing {url}: {e}")
-            total_stats['failed'] += 1
-        
-        # Extra delay between different sources
-        if i < len(urls):
-            print(f"\nWaiting before next URL...")
-            await asyncio.sleep(5)
+            while items:
+                i, url = items.popleft()
+                await limiter.acquire()
+                healthy = False
+                try:
+                    await pace(host)
+                    logger.info(f"\n[{i}/{len(urls)}] Processing: {url}\n")
+                    
+                    healthy = await run_url(scraper, url)
+                finally:
+                    if healthy:
+                        await limiter.release_ok()
+                    else:
+                        await limiter.release_err()
+        finally:
+            await scraper.cleanup()
+    
+    # Structured concurrency: if the batch is cancelled every host worker is
+    # cancelled too and its cleanup awaited before we return
+    try:
+        async with asyncio.TaskGroup() as tg:
+            for host, items in by_host.items():
+                # Lanes per site, bounded by the concurrency cap; the site's
+                # page budget is divided between them
+                lanes = min(max_concurrency, len(items))
+                for _ in range(lanes):
+                    tg.create_task(host_worker(host, items, max(1, PAGES_PER_SITE // lanes)))
+    except* Exception as eg:
+        for e in eg.exceptions:
+            logger.error(f"Host worker crashed: {type(e).__name__}: {e}")
+            errors['other'] += 1
     
     # Final summary
-    print(f"\n{'='*70}")
-    print(f"  BATCH DOWNLOAD COMPLETE")
-    print(f"{'='*70}")
-    print(f"  Total Downloaded:  {total_stats['downloaded']}")
-    print(f"  Total Skipped:     {total_stats['skipped']}")
-    print(f"  Total Failed:      {total_stats['failed']}")
-    print(f"\n  Output: {output_dir}")
-    print(f"{'='*70}\n")
-
-
-def load_urls_from_file(filepath: str) -> list[str]:
-    """Load URLs from a text file (one per line)."""
-    urls = []
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and 'tradingview.com' in line:
-                urls.append(line)
-    return urls
+    logger.info(f"\n{'='*70}")
+    logger.info(f"  BATCH DOWNLOAD COMPLETE")
+    logger.info(f"{'='*70}")
+    logger.info(f"  Total Downloaded:  {total_stats['downloaded']}")
+    logger.info(f"  Total Skipped:     {total_stats['skipped']}")
+    logger.info(f"  Total Failed:      {total_stats['failed']}")
+    if errors:
+        logger.info("  URL errors:        " + ", ".join(f"{k}={v}" for k, v in errors.most_common()))
+    logger.info(f"\n  Output: {output_dir}")
+    logger.info(f"{'='*70}\n")
+
+
+def load_urls_from_file(filepath: str) -> Iterator[str]:
+    """Yield TradingView URLs from a text file (one per line, # for comments)."""
+    with open(filepath, 'rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file can't be mapped
+            return
+        with mm:
+            # Scan the mapped file in C; only matched URLs are decoded
+            for m in _URL_LINE.finditer(mm):
+                if m.group(2).decode('ascii', 'replace').lower() in ALLOWED_HOSTS:
+                    yield m.group(1).decode('utf-8', 'replace')
 
 
 async def main():
@@ -120,6 +300,32 @@ async def main():
         help='Delay between requests'
     )
     
+    parser.add_argument(
+        '--max-concurrency', '-c',
+        type=int,
+        default=4,
+        help='Upper bound on URLs processed at the same time (adapts below this on errors)'
+    )
+    
+    parser.add_argument(
+        '--deny-cache',
+        help='Bloom filter file of URLs that failed permanently (skipped on later runs)'
+    )
+    
+    parser.add_argument(
+        '--per-url-timeout',
+        type=float,
+        default=600.0,
+        help='Give up on a URL after this many seconds'
+    )
+    
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=3,
+        help='Attempts per URL for transient (timeout/browser) errors'
+    )
+    
     args = parser.parse_args()
     
     # Collect URLs
@@ -143,19 +349,26 @@ async def main():
         sys.exit(1)
     
     # Remove duplicates while preserving order
-    seen = set()
-    unique_urls = []
-    for url in urls:
-        if url not in seen:
-            seen.add(url)
-            unique_urls.append(url)
-    
-    await batch_download(
-        urls=unique_urls,
-        output_dir=args.output,
-        delay=args.delay,
-        max_pages=args.max_pages
-    )
+    unique_urls = list(dict.fromkeys(urls))
+    
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, logging.StreamHandler(sys.stdout))
+    logger.addHandler(QueueHandler(log_queue))
+    listener.start()
+    
+    try:
+        await batch_download(
+            urls=unique_urls,
+            output_dir=args.output,
+            delay=args.delay,
+            max_pages=args.max_pages,
+            max_concurrency=args.max_concurrency,
+            deny_cache=args.deny_cache,
+            per_url_timeout=args.per_url_timeout,
+            retries=args.retries
+        )
+    finally:
+        listener.stop()
 
 
 if __name__ == '__main__':
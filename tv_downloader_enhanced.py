@@ -14,15 +14,45 @@ This version includes:
 
 import argparse
 import asyncio
+import contextlib
+import hashlib
 import json
+import math
 import os
 import random
 import re
+import sqlite3
+import struct
 import sys
-from datetime import datetime
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from itertools import islice
+from html.parser import HTMLParser
 from pathlib import Path
 from urllib.parse import urlparse, urljoin
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+
+try:
+    import orjson  # Optional: much faster JSON encoding
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard  # Optional: --compress zstd
+except ImportError:
+    zstandard = None
+
+# Playwright is imported on first use (see _import_playwright) so --help
+# and argument errors don't pay its ~300ms import
+async_playwright = PlaywrightError = PlaywrightTimeoutError = None
+
+try:
+    import uvloop  # Optional: faster event loop (Linux/macOS)
+    run = uvloop.run
+except ImportError:
+    run = asyncio.run
 
 
 # User agent pool for rotation (common browsers)
@@ -35,25 +65,736 @@ USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0',
 ]
 
+# Compiled once; used for every script
+_INVALID_CHARS = str.maketrans('', '', '<>:"/\\|?*[]')  # translate() deletion table
+_SCRIPT_ID = re.compile(r'/script/([^-/]+)')
+_PINE_VERSION = re.compile(r'//@version=(\d+)')
+_DIGITS = re.compile(r'\d+')
+
+# JSON endpoint serving a published script's source (open-source scripts only)
+PINE_FACADE_URL = 'https://www.tradingview.com/pine-facade/get/{script_id}/last/'
+# Payload "access" values meaning open-source (1 = open, 2 = protected,
+# 3 = invite-only); anything else falls through to the rendered page
+API_OPEN_ACCESS = frozenset({1, '1', 'open', 'open_no_auth'})
+# Consecutive failed endpoint requests (non-200, error, not JSON) after
+# which a run stops asking it
+API_MAX_MISSES = 5
+
+# Header written at the top of every saved .pine file
+SCRIPT_HEADER = (
+    "// Title: {title}\n"
+    "// Script ID: {script_id}\n"
+    "// Author: {author}\n"
+    "// URL: {url}\n"
+    "// Published: {published_date}\n"
+    "// Downloaded: {downloaded}\n"
+    "// Pine Version: {version}\n"
+    "// Type: {kind}\n"
+    "// Boosts: {boosts}\n"
+    "// Tags: {tags_str}\n"
+    "//\n"
+)
+
+# End-of-run report; filled from stats plus total/out in one format pass
+_SUMMARY_TMPL = """
+{rule}
+  SUMMARY
+{rule}
+  ✓ Downloaded:          {downloaded}
+  ⊘ Protected/Private:   {skipped_protected}
+  ⊘ No Source Found:     {skipped_no_code}
+  ⊘ Duplicate Source:    {skipped_duplicate}
+  ✗ Failed:              {failed}
+  ─────────────────────────────────
+  Total Processed:       {total}
+  Source Found Via:      {strategies}
+
+  Output: {out}
+{rule}
+
+"""
+
+# Selectors built once. Consent is one combined locator (any match will do);
+# source tabs are tried in priority order, most specific first.
+CONSENT_SELECTOR = ', '.join([
+    'button:has-text("Accept")',
+    'button:has-text("Accept All")',
+    'button:has-text("I agree")',
+    '[class*="cookie"] button',
+    '[class*="consent"] button',
+])
+SOURCE_TAB_SELECTORS = (
+    '[role="tab"]:has-text("Source code")',
+    'button:has-text("Source code")',
+    'div:has-text("Source code"):not(:has(*))',
+)
+SHOW_MORE_SELECTOR = 'button:has-text("Show more")'
+# Present once a script page has rendered enough to extract from
+RENDERED_SELECTOR = 'h1, [role="tab"]'
+# First script card on a listing page
+SCRIPT_CARD_SELECTOR = 'a[href*="/script/"]'
+# Source tab opened: code text is in the DOM (textContent: no layout flush)
+CODE_SHOWN_JS = "document.body.textContent.includes('//@version')"
+
+# Constant source so the browser compiles it once; the amount is an argument
+SCROLL_BY_JS = 'dy => window.scrollBy(0, dy)'
+
+# Metadata records serialized per write in the JSON Lines export
+EXPORT_CHUNK = 1000
+
+# Per-result fields kept for the metadata export, in export order. Results
+# are stored column-wise (one list per field) rather than one dict each.
+METADATA_FIELDS = (
+    'script_id', 'title', 'author', 'url', 'version', 'is_strategy', 'is_protected',
+    'has_source', 'published_date', 'description', 'tags', 'boosts',
+    'content_hash', 'dup_of', 'error',
+)
+
+# Responses that halve the request rate (and honor Retry-After)
+THROTTLE_STATUSES = frozenset({429, 503})
+
+# Browser launch flags: anti-detection basics plus background services a
+# scraper never uses (updates, sync, translate, crash reporting, ...), and
+# no per-site renderer processes, so each page costs less RAM and startup
+CHROMIUM_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-infobars',
+    '--window-size=1440,900',
+    '--disable-background-networking',
+    '--disable-background-timer-throttling',
+    '--disable-breakpad',
+    '--disable-client-side-phishing-detection',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-extensions',
+    '--disable-features=TranslateUI,IsolateOrigins,site-per-process',
+    '--disable-hang-monitor',
+    '--disable-ipc-flooding-protection',
+    '--disable-prompt-on-repost',
+    '--disable-renderer-backgrounding',
+    '--disable-sync',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+    '--safebrowsing-disable-auto-update',
+]
+
+# Resource types never needed for text extraction (aborted at the route layer)
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+# Analytics/ad hosts (suffix match), blocked whatever the resource type
+BLOCKED_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'hotjar.com', 'segment.io', 'segment.com', 'facebook.net', 'scorecardresearch.com',
+)
+
+
+# In-page extraction helpers, registered once per context with add_init_script
+# so each call is a short `window.__tvExtract.<name>()` evaluate instead of
+# shipping (and re-parsing) the whole function source per script.
+TV_EXTRACT_JS = r'''
+(() => {
+    const LINE_NO = /^\d+$/;
+    const HEAD_LINES = 30;
+    const BIG_CONTAINERS = '//div[count(*) > 50]';
+    const isPine = t => t.includes('//@version') &&
+        (t.includes('indicator(') || t.includes('strategy('));
+    const linesOf = el => Array.from(el.children, c => c.textContent?.trim() || '')
+        .filter(t => t && !LINE_NO.test(t))
+        .join('\n');
+    const headHasVersion = el => {
+        const n = Math.min(el.children.length, HEAD_LINES);
+        for (let i = 0; i < n; i++) {
+            if ((el.children[i].textContent || '').includes('//@version')) return true;
+        }
+        return false;
+    };
+
+    // Line-by-line editor container: targeted selectors first, then any div
+    // with 50+ children whose first lines hold //@version
+    const findLineCode = () => {
+        const pre = document.querySelector('pre code');
+        if (pre && isPine(pre.textContent || '')) return pre.textContent;
+
+        const lines = document.querySelector('[class*="editor"] [class*="lines"]');
+        if (lines && lines.children.length > 50 && headHasVersion(lines)) {
+            const code = linesOf(lines);
+            if (isPine(code)) return code;
+        }
+
+        // XPath filters on child count natively, so JS only visits the few
+        // large containers instead of every div on the page
+        const big = document.evaluate(BIG_CONTAINERS, document, null,
+                                      XPathResult.ORDERED_NODE_ITERATOR_TYPE, null);
+        for (let container = big.iterateNext(); container; container = big.iterateNext()) {
+            if (!headHasVersion(container)) continue;
+            const code = linesOf(container);
+            if (isPine(code)) return code;
+        }
+        return '';
+    };
+
+    // Depth-limited walk of parsed page state for a Pine source string
+    const findSource = (node, depth) => {
+        if (typeof node === 'string') return isPine(node) ? node : '';
+        if (!node || typeof node !== 'object' || depth > 8) return '';
+        for (const key in node) {
+            const code = findSource(node[key], depth + 1);
+            if (code) return code;
+        }
+        return '';
+    };
+
+    const SCRIPT_LINK = 'a[href*="/script/"]';
+    // Exact access badge labels on a script page (lowercased)
+    const BADGE_LABELS = {
+        'open-source script': 'open',
+        'invite-only script': 'invite',
+        'protected script': 'protected',
+    };
+    // Longest element text still treated as a badge (label plus icon/extra words)
+    const BADGE_TEXT_MAX = 40;
+
+    window.__tvExtract = {
+        // Queue subtrees that add script links; listing() scans only those.
+        // Starts with the whole body so the first listing() sees everything.
+        watch() {
+            window.__pending = [document.body];
+            if (window.__listObserver) return;
+            window.__listObserver = new MutationObserver(mutations => {
+                for (const m of mutations) {
+                    const nodes = m.type === 'attributes' ? [m.target] : m.addedNodes;
+                    for (const n of nodes) {
+                        if (n.nodeType === 1 && (n.matches(SCRIPT_LINK) || n.querySelector(SCRIPT_LINK))) {
+                            window.__pending.push(n);
+                        }
+                    }
+                }
+            });
+            window.__listObserver.observe(document.body, {
+                childList: true, subtree: true, attributes: true, attributeFilter: ['href']
+            });
+        },
+
+        // New script links since the last call (dedup via window.__seen)
+        listing() {
+            window.__seen = window.__seen || new Set();
+            const out = [];
+            const anchors = [];
+            if (window.__pending) {
+                for (const n of window.__pending.splice(0)) {
+                    if (!n.isConnected) continue;
+                    if (n.matches(SCRIPT_LINK)) anchors.push(n);
+                    anchors.push(...n.querySelectorAll(SCRIPT_LINK));
+                }
+            } else {
+                anchors.push(...document.querySelectorAll(SCRIPT_LINK));
+            }
+            for (const a of anchors) {
+                const href = a.href;
+                // Exclude comment links and non-script paths
+                if (href.endsWith('#chart-view-comment-form')) continue;
+                if (!/\/script\/[a-zA-Z0-9]+/.test(href)) continue;
+
+                // Clean URL: remove query params and hash
+                const cleanUrl = href.split('?')[0].split('#')[0];
+                if (window.__seen.has(cleanUrl)) continue;
+                window.__seen.add(cleanUrl);
+
+                const title = a.textContent && a.textContent.trim();
+                out.push({
+                    url: cleanUrl,
+                    title: (title && title.length > 3) ? title.substring(0, 200) : 'Unknown'
+                });
+            }
+            return out;
+        },
+
+        // Raw script metadata plus open-source classification; cleanup of
+        // author, tags and boosts happens in Python
+        meta() {
+            const meta = {
+                title: '',
+                author: '',
+                published_date: '',
+                description: '',
+                tags: [],
+                boosts_label: ''
+            };
+
+            const h1 = document.querySelector('h1');
+            if (h1) meta.title = h1.textContent.trim();
+
+            const authorLink = document.querySelector('a[href^="/u/"]');
+            if (authorLink) meta.author = authorLink.textContent;
+
+            // Published date from time element
+            const timeEl = document.querySelector('time');
+            if (timeEl) {
+                meta.published_date = timeEl.getAttribute('datetime') || timeEl.textContent.trim();
+            }
+
+            // Description from page content (full text), fallback to meta tag
+            const descDiv = document.querySelector('div[class*="description"]');
+            if (descDiv) {
+                meta.description = descDiv.innerText.trim();
+            } else {
+                const metaDesc = document.querySelector('meta[name="description"]');
+                if (metaDesc) {
+                    meta.description = metaDesc.getAttribute('content') || '';
+                }
+            }
+
+            // Tags from section with tags class
+            const tagSection = document.querySelector('section[class*="tags"]');
+            if (tagSection) {
+                meta.tags = Array.from(
+                    tagSection.querySelectorAll('a[href*="/scripts/"]'), a => a.textContent);
+            }
+
+            // Boosts from aria-label (e.g., "836 boosts")
+            const boostSpan = document.querySelector('span[aria-label*="boosts"]');
+            if (boostSpan) meta.boosts_label = boostSpan.getAttribute('aria-label') || '';
+
+            // Open-source check from the badge elements in this script's
+            // header (h1's container), so related-script cards and sidebar
+            // chips can't vote; avoids a layout flush of document.body.innerText
+            let isOpenSource = false, isInviteOnly = false, isProtected = false;
+            const header = h1 && (h1.closest('header, [class*="header"], [class*="Header"]') ||
+                                  h1.parentElement?.parentElement);
+            const badges = header ? header.querySelectorAll(
+                '[class*="badge"], [class*="tag"], [class*="scriptType"]') : [];
+            for (const b of badges) {
+                const t = (b.textContent || '').toLowerCase();
+                if (t.includes('open-source')) isOpenSource = true;
+                if (t.includes('invite-only')) isInviteOnly = true;
+                if (t.includes('protected')) isProtected = true;
+            }
+
+            // Fallback 1: a short element holding a badge label (icon
+            // children or extra words allowed; long description blocks aren't)
+            const main = document.querySelector('main') || document.body;
+            const matchLabels = text => {
+                for (const [label, kind] of Object.entries(BADGE_LABELS)) {
+                    if (!text.includes(label)) continue;
+                    if (kind === 'open') isOpenSource = true;
+                    else if (kind === 'invite') isInviteOnly = true;
+                    else isProtected = true;
+                }
+            };
+            if (!isOpenSource && !isInviteOnly && !isProtected) {
+                for (const el of main.querySelectorAll('span, div, a, p, button')) {
+                    const t = (el.textContent || '').trim().toLowerCase();
+                    if (t.length <= BADGE_TEXT_MAX) matchLabels(t);
+                }
+            }
+
+            // Fallback 2: bounded, case-insensitive text of the header and
+            // the start of main for the label phrases
+            if (!isOpenSource && !isInviteOnly && !isProtected) {
+                matchLabels(((header ? header.textContent : '') + ' ' +
+                             (main.textContent || '').slice(0, 4000)).toLowerCase());
+            }
+
+            meta.script_type = {
+                isOpenSource: isOpenSource && !isInviteOnly && !isProtected,
+                isInviteOnly,
+                isProtected
+            };
+            return meta;
+        },
+
+        // Code from the editor container or any pre/code element, in one scan
+        findCode() {
+            const code = findLineCode();
+            if (code) return code;
+
+            // Fallback: any pre/code element with Pine Script content
+            for (const elem of document.querySelectorAll('pre, code, [class*="source"]')) {
+                const text = elem.textContent || '';
+                if (text.length > 100 &&
+                    (text.includes('//@version') ||
+                     text.includes('indicator(') ||
+                     text.includes('strategy(') ||
+                     text.includes('plot('))) {
+                    return text;
+                }
+            }
+            return '';
+        },
+
+        // Code from data embedded in the page: Next.js __NEXT_DATA__,
+        // window.initialState, or a "source" string in any inline script
+        embedded() {
+            const next = document.getElementById('__NEXT_DATA__');
+            if (next) {
+                try {
+                    const code = findSource(JSON.parse(next.textContent), 0);
+                    if (code) return code;
+                } catch (e) {}
+            }
+            if (window.initialState) {
+                const code = findSource(window.initialState, 0);
+                if (code) return code;
+            }
+            for (const script of document.querySelectorAll('script')) {
+                const content = script.textContent || '';
+                const match = content.match(/"source"\s*:\s*"([^"]+)"/);
+                if (match) {
+                    const decoded = match[1]
+                        .replace(/\\n/g, '\n')
+                        .replace(/\\t/g, '\t')
+                        .replace(/\\"/g, '"');
+                    if (decoded.includes('//@version') || decoded.includes('indicator(')) {
+                        return decoded;
+                    }
+                }
+            }
+            return '';
+        },
+
+        // Both code strategies in one round-trip: rendered code, else
+        // embedded data; `via` names the one that hit
+        code() {
+            const rendered = this.findCode();
+            if (rendered) return {via: 'rendered', code: rendered};
+            const embedded = this.embedded();
+            return {via: embedded ? 'embedded' : '', code: embedded};
+        }
+    };
+})();
+'''
+
+
+def dumps_pretty(obj) -> bytes:
+    """Indented UTF-8 JSON; orjson when installed, stdlib json otherwise."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2, default=str)
+    return json.dumps(obj, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+
+
+def dumps_line(obj) -> bytes:
+    """One compact JSON object plus newline (a JSON Lines record)."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE, default=str)
+    return (json.dumps(obj, ensure_ascii=False, default=str) + '\n').encode('utf-8')
+
+
+class ListingUnavailableError(Exception):
+    """Listing page answered with a permanent HTTP error (e.g. 404)."""
+
+
+class BloomFilter:
+    """Compact on-disk URL set (false positives possible, no false negatives)."""
+
+    _HEADER = struct.Struct('<4sQII')  # magic, bit count, hash count, item count
+    _MAGIC = b'TVBF'
+
+    def __init__(self, capacity: int = 10000, bits_per_item: int = 8):
+        self.num_bits = max(64, capacity * bits_per_item)
+        self.num_hashes = max(1, round(bits_per_item * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = struct.unpack('<QQ', digest)
+        for i in range(self.num_hashes):
+            yield (h1 + i * h2) % self.num_bits
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def saturated(self) -> bool:
+        """More items than the filter was sized for (false-positive rate climbing)."""
+        return self.count * self.num_hashes > self.num_bits * math.log(2)
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
 
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    def save(self, path: Path):
+        with open(path, 'wb') as f:
+            f.write(self._HEADER.pack(self._MAGIC, self.num_bits, self.num_hashes, self.count))
+            f.write(self.bits)
+
+    @classmethod
+    def load(cls, path: Path) -> 'BloomFilter':
+        """Load a filter from disk, or return an empty one if missing/corrupt."""
+        bloom = cls()
+        try:
+            data = path.read_bytes()
+            magic, num_bits, num_hashes, count = cls._HEADER.unpack_from(data)
+            bits = data[cls._HEADER.size:]
+            if magic == cls._MAGIC and len(bits) == (num_bits + 7) // 8:
+                bloom.num_bits, bloom.num_hashes, bloom.count = num_bits, num_hashes, count
+                bloom.bits = bytearray(bits)
+        except (OSError, struct.error):
+            pass
+        return bloom
+
+
+class SourceCache:
+    """
+    Extracted sources kept across runs in SQLite, keyed by script ID and
+    published date: an unchanged script is served without the source scan.
+    """
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(path, isolation_level=None)  # autocommit
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS cache ('
+                          'script_id TEXT PRIMARY KEY, published_date TEXT, source_code TEXT)')
+
+    def get(self, script_id: str, published_date: str) -> str | None:
+        row = self.conn.execute('SELECT source_code FROM cache WHERE script_id = ? AND published_date = ?',
+                                (script_id, published_date)).fetchone()
+        return row[0] if row else None
+
+    def put(self, script_id: str, published_date: str, source_code: str):
+        self.conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                          (script_id, published_date, source_code))
+
+    def close(self):
+        self.conn.close()
+
+
+class TokenBucket:
+    """
+    Async token bucket whose rate adapts to the server: halved (and paused
+    for Retry-After) on HTTP 429/503, nudged back up by 5% on each success.
+    """
+
+    def __init__(self, rate: float, burst: int, max_rate: float = None, min_rate: float = 0.05):
+        self.rate = rate
+        self.max_rate = max_rate or rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self._last = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may start."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self, retry_after: float):
+        """Server said slow down (429/503): halve the rate and pause everyone."""
+        self.rate = max(self.min_rate, self.rate * 0.5)
+        self.tokens = 0.0
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        print(f"         (throttled: pausing {retry_after:.0f}s, rate now {self.rate:.2f}/s)")
+
+    def reward(self):
+        """Successful response: creep back toward the cap."""
+        self.rate = min(self.max_rate, self.rate * 1.05)
+
+
+class SlidingWindow:
+    """
+    Hard ceiling of `limit` starts per `period` seconds, independent of any
+    server feedback, so a fresh run can't burst past the site's global limit.
+    """
+
+    def __init__(self, limit: int, period: float = 60.0):
+        self.limit = max(1, limit)
+        self.period = period
+        self._starts = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until the oldest start in the window has aged out."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                while self._starts and now - self._starts[0] >= self.period:
+                    self._starts.popleft()
+                if len(self._starts) < self.limit:
+                    self._starts.append(now)
+                    return
+                await asyncio.sleep(self._starts[0] + self.period - now)
+
+
+class AIMDController:
+    """
+    Concurrency limit that grows additively (+alpha per request) while the
+    windowed average latency stays under target, and is cut multiplicatively
+    (x beta) on 429/5xx/timeouts or when latency overshoots.
+    """
+
+    def __init__(self, maximum: int, target_latency: float = 15.0,
+                 alpha: float = 0.5, beta: float = 0.5, window: int = 10):
+        self.maximum = maximum
+        self.limit = float(maximum)
+        self.target_latency = target_latency
+        self.alpha = alpha
+        self.beta = beta
+        self.active = 0
+        self._latencies = deque(maxlen=window)
+        self._cond = asyncio.Condition()
+
+    @contextlib.asynccontextmanager
+    async def slot(self):
+        """Hold one unit of concurrency while the body runs."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.active < int(self.limit))
+            self.active += 1
+        try:
+            yield
+        finally:
+            async with self._cond:
+                self.active -= 1
+                self._cond.notify_all()
+
+    def record(self, latency: float, overloaded: bool):
+        """Feed one request's outcome; waiters see a raised limit on release."""
+        self._latencies.append(latency)
+        average = sum(self._latencies) / len(self._latencies)
+        before = int(self.limit)
+        if overloaded or average > self.target_latency:
+            self.limit = max(1.0, self.limit * self.beta)
+            self._latencies.clear()  # Judge the new limit on fresh samples
+        else:
+            self.limit = min(float(self.maximum), self.limit + self.alpha)
+        if int(self.limit) != before:
+            print(f"         (concurrency {before} → {int(self.limit)}, avg latency {average:.1f}s)")
+
+
+def is_overload_error(error: str | None) -> bool:
+    """Result errors that mean the server is struggling (429, 5xx, timeout)."""
+    return bool(error) and (error == 'Timeout' or error.startswith(('HTTP 429', 'HTTP 5')))
+
+
+def parse_retry_after(value: str, default: float = 5.0) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+        return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+@contextlib.contextmanager
+def open_output(path: Path, compress: bool = False):
+    """Binary writer for path; with compress, a zstd (level 3) stream instead."""
+    with open(path, 'wb', buffering=1 << 16) as f:
+        if not compress:
+            yield f
+            return
+        with zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(f) as z:
+            yield z
+
+
+def _import_playwright():
+    """Bind the Playwright names used by the scraper."""
+    global async_playwright, PlaywrightError, PlaywrightTimeoutError
+    if async_playwright is None:
+        from playwright.async_api import (async_playwright, Error as PlaywrightError,
+                                          TimeoutError as PlaywrightTimeoutError)
+
+
+@lru_cache(maxsize=256)
 def sanitize_filename(name: str) -> str:
     """Convert a string to a valid filename."""
-    name = re.sub(r'[<>:"/\\|?*\[\]]', '', name)
-    name = re.sub(r'\s+', '_', name)
+    # One C-level pass to drop invalid chars; split/join collapses whitespace runs
+    name = '_'.join(name.translate(_INVALID_CHARS).split())
     name = name.strip('._')
     return name[:200] if len(name) > 200 else name or "unnamed_script"
 
 
 def extract_script_id(url: str) -> str:
     """Extract script ID from TradingView URL."""
-    match = re.search(r'/script/([^-/]+)', url)
+    match = _SCRIPT_ID.search(url)
     return match.group(1) if match else ""
 
 
+class ScriptLinkParser(HTMLParser):
+    """Collect script links (url, title) from server-rendered listing HTML."""
+
+    def __init__(self, base_url: str):
+        super().__init__()
+        self.base_url = base_url
+        self.scripts = {}  # url -> title, in page order
+        self._href = None
+        self._text = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href') or ''
+            self._href = href if '/script/' in href else None
+            self._text = []
+
+    def handle_data(self, data):
+        if self._href is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag):
+        if tag != 'a' or self._href is None:
+            return
+        # Same cleanup as the in-page listing(): absolute, no query or hash
+        url = urljoin(self.base_url, self._href).split('?')[0].split('#')[0]
+        self._href = None
+        if not _SCRIPT_ID.search(url) or url in self.scripts:
+            return
+        title = ''.join(self._text).strip()
+        self.scripts[url] = title[:200] if len(title) > 3 else 'Unknown'
+
+
 class EnhancedTVScraper:
-    def __init__(self, output_dir: str = "./pinescript_downloads", headless: bool = True):
+    def __init__(self, output_dir: str = "./pinescript_downloads", headless: bool = True,
+                 known_ids: set[str] | None = None, concurrency: int = 4,
+                 stealth: bool = False, pretty_metadata: bool = False, per_host: int = 4,
+                 max_connections: int = 100, rpm: int | None = None,
+                 rps: int | None = None, compress: bool = False):
+        _import_playwright()
         self.output_dir = Path(output_dir)
         self.headless = headless
+        # Mouse/scroll/reaction-time noise on script pages (off: ~1s saved per URL)
+        self.stealth = stealth
+        # metadata.json (indented, one document) instead of metadata.jsonl
+        self.pretty_metadata = pretty_metadata
+        # zstd-compress .pine files and the metadata export (.zst suffix)
+        self.compress = compress
+        self.concurrency = max(1, concurrency)
+        # In-flight requests allowed per hostname; extra work waits its turn
+        self.per_host = max(1, per_host)
+        self._host_sems: dict[str, asyncio.Semaphore] = {}
+        # Hard ceiling on simultaneous network requests (API calls + page loads)
+        self._connections = asyncio.Semaphore(max(1, max_connections))
+        # Fixed requests-per-minute/second ceilings (checked before the adaptive bucket)
+        self._windows = [SlidingWindow(n, period) for n, period in ((rpm, 60.0), (rps, 1.0)) if n]
+        # Script IDs already saved somewhere under output_dir; may be shared
+        # between scrapers so one index page doesn't re-fetch another's scripts
+        self.known_ids = known_ids if known_ids is not None else set()
+        # BLAKE2b of saved source -> script ID, persisted in output_dir/.hashes
+        self.content_hashes = None
+        self.playwright = None
+        self.http = None
         self.browser = None
         self.context = None
         self.page = None
@@ -61,14 +802,32 @@ class EnhancedTVScraper:
             'downloaded': 0,
             'skipped_protected': 0,
             'skipped_no_code': 0,
+            'skipped_duplicate': 0,
             'failed': 0,
             'total': 0
         }
-        self.results = []
+        self.results = self._new_results()
+        # Sources from earlier runs (output_dir/.source_cache.sqlite), opened per run
+        self.source_cache = None
+        # Background .pine writer, started on the first save (bounded queue)
+        self._write_queue = None
+        self._writer_task = None
+        # Which extraction strategy produced each source (shown in the summary)
+        self.strategy_hits = Counter()
         self.progress_file = None
+        self.completed = None  # BloomFilter of finished URLs for this category
+        self._category_dirs = {}
+        # Cookies/localStorage captured after consent, reused by every new context
+        self.state_path = self.output_dir / '.state.json'
+        self.storage_state = None
+        self._consent_done = False
+        # Request pacing; created per run in download_all
+        self.rate_limiter = None
+        # Monotonic time before which rate-limit headers asked us not to send
+        self._next_ok_at = 0.0
+        # Consecutive failed pine-facade requests this run (API_MAX_MISSES disables it)
+        self._api_misses = 0
         # Anti-detection state
-        self.consecutive_failures = 0
-        self.base_delay = 2.0  # Base delay in seconds
         self.current_user_agent = random.choice(USER_AGENTS)
         
     async def setup(self):
@@ -76,20 +835,38 @@ class EnhancedTVScraper:
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(
             headless=self.headless,
-            args=[
-                '--disable-blink-features=AutomationControlled',
-                '--no-sandbox',
-                '--disable-dev-shm-usage',
-                '--disable-infobars',
-                '--window-size=1920,1080',
-            ]
+            args=CHROMIUM_ARGS
+        )
+
+        # Reuse consent state from an earlier run if we have it
+        if self.state_path.exists():
+            try:
+                with open(self.state_path) as f:
+                    self.storage_state = json.load(f)
+            except (OSError, ValueError):
+                self.storage_state = None
+
+        self.context = await self._new_context()
+        # Listing page; script pages come from a page pool in download_all
+        self.page = await self.context.new_page()
+
+        # One long-lived HTTP client for JSON endpoints (keeps connections
+        # open across scripts; independent of the pages' network stack)
+        self.http = await self.playwright.request.new_context(
+            user_agent=self.current_user_agent,
+            extra_http_headers={'Accept': 'application/json'},
+            storage_state=self.storage_state,
+            timeout=5000,
         )
 
+    async def _new_context(self):
+        """Create a browser context with the anti-detection settings applied."""
         # Randomize viewport within realistic ranges
-        viewport_width = random.randint(1280, 1920)
-        viewport_height = random.randint(800, 1080)
+        # (kept modest: compositor buffers scale with viewport area)
+        viewport_width = random.randint(1280, 1440)
+        viewport_height = random.randint(720, 900)
 
-        self.context = await self.browser.new_context(
+        context = await self.browser.new_context(
             viewport={'width': viewport_width, 'height': viewport_height},
             user_agent=self.current_user_agent,
             locale='en-US',
@@ -98,171 +875,236 @@ class EnhancedTVScraper:
             java_script_enabled=True,
             has_touch=False,
             is_mobile=False,
+            storage_state=self.storage_state,
         )
-        self.page = await self.context.new_page()
 
         # Mask webdriver property to avoid detection
-        await self.page.add_init_script("""
+        await context.add_init_script("""
             Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
             Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3, 4, 5]});
             Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
             window.chrome = {runtime: {}};
         """)
 
+        # Extraction helpers, defined on every page before its own scripts run
+        await context.add_init_script(TV_EXTRACT_JS)
+
+        # Only DOM text is read, so skip heavy resources entirely
+        await context.route('**/*', self._block_heavy_resources)
+
         # Handle cookie consent popups
-        self.page.on('dialog', lambda dialog: dialog.accept())
+        context.on('page', lambda page: page.on('dialog', lambda dialog: dialog.accept()))
+        return context
         
+    @staticmethod
+    async def _block_heavy_resources(route):
+        """Abort images, media, fonts, stylesheets and trackers; let everything else through."""
+        request = route.request
+        if (request.resource_type in BLOCKED_RESOURCE_TYPES
+                or (urlparse(request.url).hostname or '').endswith(BLOCKED_HOSTS)):
+            await route.abort()
+        else:
+            await route.continue_()
+
     async def cleanup(self):
-        """Close browser and cleanup."""
+        """Close browser and cleanup. Safe to call more than once."""
+        await self._stop_writer()
+        if self.http:
+            await self.http.dispose()
         if self.browser:
             await self.browser.close()
         if self.playwright:
             await self.playwright.stop()
+        self.playwright = self.browser = self.context = self.page = self.http = None
 
-    def _get_random_delay(self) -> float:
-        """Get randomized delay with jitter and backoff for failures."""
-        # Base delay: 2-5 seconds with random jitter
-        delay = self.base_delay + random.uniform(0, 3)
-        # Add small jitter (0-500ms)
-        delay += random.uniform(0, 0.5)
-        # Increase delay if we've had consecutive failures (backoff)
-        if self.consecutive_failures > 0:
-            backoff_multiplier = min(self.consecutive_failures, 5)  # Cap at 5x
-            delay *= (1 + backoff_multiplier * 0.5)
-            print(f"         (backoff: {delay:.1f}s delay due to {self.consecutive_failures} failures)")
-        return delay
-
-    async def _human_like_delay(self, min_ms: int = 100, max_ms: int = 500):
-        """Small random delay to simulate human reaction time."""
-        await self.page.wait_for_timeout(random.randint(min_ms, max_ms))
-
-    async def _human_like_scroll(self):
+    def reset_stats(self):
+        """Zero the per-run counters (stats and strategy hits) before a run."""
+        self.stats = dict.fromkeys(self.stats, 0)
+        self.strategy_hits = Counter()
+
+    async def __aenter__(self):
+        """Keep one warm browser alive across several download_all() calls."""
+        await self.setup()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.cleanup()
+
+    @staticmethod
+    async def _human_like_delay(min_ms: int = 100, max_ms: int = 500):
+        """Small random delay to simulate human reaction time (no browser round-trip)."""
+        await asyncio.sleep(random.uniform(min_ms, max_ms) / 1000)
+
+    async def _human_like_scroll(self, page):
         """Perform human-like scrolling behavior."""
         # Random scroll down
         scroll_amount = random.randint(100, 400)
-        await self.page.evaluate(f'window.scrollBy(0, {scroll_amount})')
+        await page.evaluate(SCROLL_BY_JS, scroll_amount)
         await self._human_like_delay(200, 600)
 
         # Sometimes scroll back up a bit
         if random.random() < 0.3:
             scroll_back = random.randint(50, 150)
-            await self.page.evaluate(f'window.scrollBy(0, -{scroll_back})')
+            await page.evaluate(SCROLL_BY_JS, -scroll_back)
             await self._human_like_delay(100, 300)
 
-    async def _human_like_mouse_move(self):
+    async def _human_like_mouse_move(self, page):
         """Simulate random mouse movements."""
         try:
             # Get viewport size
-            viewport = self.page.viewport_size
+            viewport = page.viewport_size
             if viewport:
                 # Move mouse to random position
                 x = random.randint(100, viewport['width'] - 100)
                 y = random.randint(100, viewport['height'] - 100)
-                await self.page.mouse.move(x, y)
+                await page.mouse.move(x, y)
                 await self._human_like_delay(50, 200)
-        except:
-            pass  # Ignore mouse movement errors
+        except (PlaywrightError, ValueError):
+            pass  # Ignore mouse movement errors (or a viewport too small to pick from)
 
-    async def handle_cookie_consent(self):
+    async def handle_cookie_consent(self, page=None):
         """Click away cookie consent banners if present."""
+        if self._consent_done:
+            return
+        page = page or self.page
+        # One combined locator: a single click attempt instead of a count() per selector
         try:
-            consent_selectors = [
-                'button:has-text("Accept")',
-                'button:has-text("Accept All")',
-                'button:has-text("I agree")',
-                '[class*="cookie"] button',
-                '[class*="consent"] button'
-            ]
-            for selector in consent_selectors:
-                try:
-                    btn = self.page.locator(selector)
-                    if await btn.count() > 0:
-                        await btn.first.click()
-                        await self.page.wait_for_timeout(500)
-                        break
-                except:
-                    continue
-        except:
-            pass
+            await page.locator(CONSENT_SELECTOR).first.click(timeout=500)
+            self._consent_done = True
+        except PlaywrightError:
+            pass  # No banner; cancellation and Ctrl-C still propagate
 
-    async def get_scripts_from_listing(self, max_scroll_attempts: int = 20) -> list[dict]:
-        """Get all scripts by scrolling and clicking 'load more'."""
-        scripts = {}
-        last_count = 0
+    async def stream_listing(self, max_scroll_attempts: int = 20):
+        """Yield scripts from the listing as they appear, scrolling and clicking 'load more'."""
         no_change_count = 0
         
+        # Dedup lives in the page: each evaluate returns only anchors not seen
+        # before, and a MutationObserver limits each scan to newly added nodes
+        await self.page.evaluate('window.__seen = new Set(); window.__tvExtract.watch()')
+
         for attempt in range(max_scroll_attempts):
-            # Get current scripts (improved extraction)
-            current_scripts = await self.page.evaluate('''() => {
-                const scripts = [];
-                const links = document.querySelectorAll('a');
-
-                links.forEach(link => {
-                    const href = link.href;
-                    // Include /script/ links, exclude comment links
-                    if (href &&
-                        href.includes('/script/') &&
-                        href.match(/\\/script\\/[a-zA-Z0-9]+/) &&
-                        !href.endsWith('#chart-view-comment-form')) {
-
-                        // Clean URL: remove query params and hash
-                        const cleanUrl = href.split('?')[0].split('#')[0];
-                        const title = link.textContent?.trim();
-
-                        if (!scripts.some(s => s.url === cleanUrl)) {
-                            scripts.push({
-                                url: cleanUrl,
-                                title: (title && title.length > 3) ? title.substring(0, 200) : 'Unknown'
-                            });
-                        }
-                    }
-                });
+            new_scripts = await self.page.evaluate('window.__tvExtract.listing()')
+            for s in new_scripts:
+                yield s
 
-                return scripts;
-            }''')
-            
-            # Add to collection
-            for s in current_scripts:
-                if s['url'] not in scripts:
-                    scripts[s['url']] = s
-            
             # Check if we got new scripts
-            if len(scripts) == last_count:
+            if not new_scripts:
                 no_change_count += 1
                 if no_change_count >= 3:
                     break
             else:
                 no_change_count = 0
             
-            last_count = len(scripts)
-            print(f"   Found {len(scripts)} scripts... (attempt {attempt + 1})", end='\r')
-            
-            # Try to load more with human-like behavior
-            try:
-                load_more = self.page.locator('button:has-text("Show more")')
-                if await load_more.count() > 0:
-                    await self._human_like_delay(300, 800)
-                    await load_more.first.click()
-                    await self.page.wait_for_timeout(random.randint(1500, 2500))
-                else:
-                    # Try scrolling instead with random amounts
-                    scroll_amount = random.randint(500, 1000)
-                    await self.page.evaluate(f'window.scrollBy(0, {scroll_amount})')
-                    await self.page.wait_for_timeout(random.randint(1200, 2000))
-            except:
-                scroll_amount = random.randint(500, 1000)
-                await self.page.evaluate(f'window.scrollBy(0, {scroll_amount})')
-                await self.page.wait_for_timeout(random.randint(1200, 2000))
-        
-        print()  # New line after progress
-        return list(scripts.values())
+            await self._load_more_listing()
 
-    async def extract_pine_source(self, script_url: str) -> dict:
+    async def listing_scripts(self, base_url: str, max_pages: int = 20):
         """
-        Extract Pine Script source code using multiple strategies.
-        Returns dict with: source_code, title, version, is_strategy, error
+        Yield listing scripts, from plain HTTP fetches of the server-rendered
+        pages when the listing paginates that way, else by scrolling in the browser.
+        """
+        pages = await self._collect_urls_http(base_url, max_pages)
+        seen = set()
+        for page_scripts in pages:
+            for s in page_scripts:
+                seen.add(s['url'])
+                yield s
+        if len(pages) > 1:
+            return  # Paginated server-side: every page was fetched over HTTP
+        # Client-rendered (or single-page) listing: the browser finds the rest
+        async for s in self.stream_listing(max_pages):
+            if s['url'] not in seen:
+                seen.add(s['url'])
+                yield s
+
+    async def _fetch_listing_page(self, url: str) -> list[dict]:
+        """Script links on one listing page fetched without rendering ([] on failure)."""
+        # Every listing request counts against --rpm/--rps, the token
+        # bucket and the server's rate window, like a script page does
+        for window in self._windows:
+            await window.acquire()
+        if self.rate_limiter:
+            await self.rate_limiter.acquire()
+        await self._wait_for_rate_window()
+        try:
+            async with self._host_slot(url), self._connections:
+                response = await self.http.get(url, headers={'Accept': 'text/html'})
+            self._note_headers(response.headers)
+            if response.status != 200:
+                return []
+            html = await response.text()
+        except PlaywrightError:
+            return []
+        parser = ScriptLinkParser(url)
+        parser.feed(html)
+        return [{'url': u, 'title': t} for u, t in parser.scripts.items()]
+
+    async def _collect_urls_http(self, base_url: str, max_pages: int) -> list[list[dict]]:
+        """
+        Fetch the listing, probe page-2/, then fetch the remaining page-N/
+        pages concurrently (bounded by --per-host). Returns the scripts of
+        each page up to the first one that adds nothing new; [] when HTTP
+        finds nothing.
         """
-        result = {
+        if not self.http:
+            return []
+        root = base_url.split('?')[0].rstrip('/') + '/'
+        urls = [base_url] + [f'{root}page-{n}/' for n in range(2, max_pages + 1)]
+        first = await self._fetch_listing_page(urls[0])
+        if not first:
+            return []
+        pages, seen = [first], {s['url'] for s in first}
+        # Probe page 2 alone so unpaginated listings cost one extra request
+        probe = [await self._fetch_listing_page(urls[1])] if len(urls) > 1 else []
+        rest = urls[2:] if probe and probe[0] else []
+        for page_scripts in probe + await asyncio.gather(*map(self._fetch_listing_page, rest)):
+            new = [s for s in page_scripts if s['url'] not in seen]
+            if not new:
+                break  # Past the last page (or pagination isn't server-side)
+            seen.update(s['url'] for s in new)
+            pages.append(new)
+        return pages
+
+    async def _load_more_listing(self):
+        """Try to load more, then wait until new script links show up."""
+        # One find-and-click attempt; no separate count() round-trip
+        try:
+            await self.page.locator(SHOW_MORE_SELECTOR).first.click(timeout=500)
+            await self._wait_for_new_links(2500)
+        except PlaywrightError:
+            # No button: try scrolling instead with random amounts
+            scroll_amount = random.randint(500, 1000)
+            await self.page.evaluate(SCROLL_BY_JS, scroll_amount)
+            await self._wait_for_new_links(2000)
+
+    async def _wait_for_new_links(self, timeout_ms: int):
+        """Return once the observer has queued new script links, or after timeout_ms."""
+        try:
+            await self.page.wait_for_function('window.__pending && window.__pending.length > 0',
+                                              timeout=timeout_ms)
+        except PlaywrightError:
+            pass  # Nothing new; the caller counts an empty round
+
+    async def get_scripts_from_listing(self, max_scroll_attempts: int = 20) -> list[dict]:
+        """Get all scripts by scrolling and clicking 'load more'."""
+        scripts = []
+        async for s in self.stream_listing(max_scroll_attempts):
+            scripts.append(s)
+            print(f"   Found {len(scripts)} scripts...", end='\r')
+        print()  # New line after progress
+        return scripts
+
+    def _host_slot(self, url: str) -> asyncio.Semaphore:
+        """Per-host concurrency cap, created on first request to that host."""
+        host = urlparse(url).netloc
+        sem = self._host_sems.get(host)
+        if sem is None:
+            sem = self._host_sems[host] = asyncio.Semaphore(self.per_host)
+        return sem
+
+    @staticmethod
+    def _new_result(script_url: str) -> dict:
+        """Blank result record for a script URL."""
+        return {
             'url': script_url,
             'script_id': extract_script_id(script_url),
             'title': '',
@@ -277,108 +1119,68 @@ class EnhancedTVScraper:
             'boosts': 0,
             'error': None
         }
+
+    async def extract_pine_source(self, script_url: str, page=None) -> dict:
+        """
+        Extract Pine Script source code using multiple strategies.
+        Returns dict with: source_code, title, version, is_strategy, error
+        """
+        page = page or self.page
+        result = self._new_result(script_url)
+        
+        # Fast path: the JSON API, no page render at all when its payload
+        # carries the metadata too; otherwise the page still supplies it
+        api_hit = await self._try_api_extraction(result)
+        if api_hit and result['published_date']:
+            self.strategy_hits['api'] += 1
+            return result
         
         try:
-            response = await self.page.goto(script_url, wait_until='domcontentloaded', timeout=30000)
+            await self._wait_for_rate_window()
+            response = await self._goto(page, script_url)
+            if response:
+                self._note_headers(response.headers)
+            # Rate limited or overloaded: honor Retry-After, slow everyone
+            # down, try once more
+            if response and response.status in THROTTLE_STATUSES and self.rate_limiter:
+                self.rate_limiter.throttle(parse_retry_after(response.headers.get('retry-after')))
+                await self.rate_limiter.acquire()
+                response = await self._goto(page, script_url)
             if not response or response.status >= 400:
                 result['error'] = f"HTTP {response.status if response else 'No response'}"
                 return result
+            if self.rate_limiter:
+                self.rate_limiter.reward()
 
-            # Human-like behavior: wait, scroll, move mouse
-            await self.page.wait_for_timeout(random.randint(1500, 2500))
-            await self.handle_cookie_consent()
-            await self._human_like_mouse_move()
-            await self._human_like_scroll()
-            
-            # Extract metadata
-            result['title'] = await self.page.evaluate('''() => {
-                const h1 = document.querySelector('h1');
-                return h1 ? h1.textContent.trim() : '';
-            }''')
+            # Wait until the script header renders (returns as soon as it's
+            # there, bounded); human-like pauses and scroll/mouse only in stealth mode
+            try:
+                await page.wait_for_selector(RENDERED_SELECTOR, state='attached', timeout=5000)
+            except PlaywrightTimeoutError:
+                pass
+            if self.stealth:
+                await self._human_like_delay(500, 1500)
+            if not self.storage_state:
+                await self.handle_cookie_consent(page)
+            if self.stealth:
+                await self._human_like_mouse_move(page)
+                await self._human_like_scroll(page)
             
-            result['author'] = await self.page.evaluate('''() => {
-                const authorLink = document.querySelector('a[href^="/u/"]');
-                return authorLink ? authorLink.textContent.trim().replace('by ', '') : '';
-            }''')
-
-            # Extract extended metadata (published date, description, tags, stats)
-            extended_meta = await self.page.evaluate('''() => {
-                const meta = {
-                    published_date: '',
-                    description: '',
-                    tags: [],
-                    boosts: 0
-                };
-
-                // Published date from time element
-                const timeEl = document.querySelector('time');
-                if (timeEl) {
-                    meta.published_date = timeEl.getAttribute('datetime') || timeEl.textContent.trim();
-                }
+            # Extract metadata and classification in a single round-trip
+            meta = await page.evaluate('window.__tvExtract.meta()')
 
-                // Description from page content (full text), fallback to meta tag
-                const descDiv = document.querySelector('div[class*="description"]');
-                if (descDiv) {
-                    meta.description = descDiv.innerText.trim();
-                } else {
-                    const metaDesc = document.querySelector('meta[name="description"]');
-                    if (metaDesc) {
-                        meta.description = metaDesc.getAttribute('content') || '';
-                    }
-                }
-
-                // Tags from section with tags class
-                const tagSection = document.querySelector('section[class*="tags"]');
-                if (tagSection) {
-                    const tagLinks = tagSection.querySelectorAll('a[href*="/scripts/"]');
-                    tagLinks.forEach(a => {
-                        const tagName = a.textContent.trim();
-                        if (tagName && !meta.tags.includes(tagName)) {
-                            meta.tags.push(tagName);
-                        }
-                    });
-                }
+            for key in ('title', 'published_date', 'description'):
+                result[key] = meta[key]
+            result['author'] = meta['author'].strip().removeprefix('by ')
+            # Unique, non-empty tags in page order
+            result['tags'] = list(dict.fromkeys(t for t in map(str.strip, meta['tags']) if t))
+            boosts = _DIGITS.search(meta['boosts_label'])
+            result['boosts'] = int(boosts.group()) if boosts else 0
+            script_type = meta['script_type']
 
-                // Boosts from aria-label (e.g., "836 boosts")
-                const boostSpan = document.querySelector('span[aria-label*="boosts"]');
-                if (boostSpan) {
-                    const label = boostSpan.getAttribute('aria-label') || '';
-                    const match = label.match(/(\\d+)/);
-                    if (match) meta.boosts = parseInt(match[1], 10);
-                }
-
-                return meta;
-            }''')
-
-            # Merge extended metadata
-            result['published_date'] = extended_meta.get('published_date', '')
-            result['description'] = extended_meta.get('description', '')
-            result['tags'] = extended_meta.get('tags', [])
-            result['boosts'] = extended_meta.get('boosts', 0)
-
-            # Check if open-source (FIXED: look for explicit open-source indicator, not lock icons)
-            script_type = await self.page.evaluate('''() => {
-                const pageText = document.body.innerText;
-                const pageUpper = pageText.toUpperCase();
-                
-                // Check for explicit OPEN-SOURCE indicator
-                const isOpenSource = pageUpper.includes('OPEN-SOURCE SCRIPT') || 
-                                    pageUpper.includes('OPEN-SOURCE') ||
-                                    pageText.includes('Open-source script');
-                
-                // Check for invite-only or protected (these override open-source)
-                const isInviteOnly = pageText.toLowerCase().includes('invite-only');
-                const isProtected = pageText.toLowerCase().includes('protected script');
-                
-                return {
-                    isOpenSource: isOpenSource && !isInviteOnly && !isProtected,
-                    isInviteOnly,
-                    isProtected
-                };
-            }''')
-            
             if not script_type['isOpenSource']:
                 result['is_protected'] = True
+                result['source_code'] = ''
                 if script_type['isInviteOnly']:
                     result['error'] = 'invite-only'
                 elif script_type['isProtected']:
@@ -387,23 +1189,28 @@ class EnhancedTVScraper:
                     result['error'] = 'not open-source'
                 return result
             
-            # Strategy 1: Click Source Code tab and extract
-            source_code = await self._try_source_tab_extraction()
-            
-            # Strategy 2: Look for code in page directly
-            if not source_code:
-                source_code = await self._try_direct_extraction()
+            # Unchanged since an earlier run: reuse that source, no scan or click
+            cache_key = (result['script_id'], result['published_date'])
+            cacheable = self.source_cache is not None and all(cache_key)
+            if api_hit:
+                self.strategy_hits['api'] += 1
+                if cacheable:
+                    self.source_cache.put(*cache_key, result['source_code'])
+                return result
+            source_code = self.source_cache.get(*cache_key) if cacheable else None
+            if source_code:
+                self.strategy_hits['cache'] += 1
+                self._set_source(result, source_code)
+                return result
             
-            # Strategy 3: Check for embedded script data
-            if not source_code:
-                source_code = await self._try_embedded_extraction()
+            # Cheap in-page scan first; the Source Code tab only if that misses
+            source_code, via = await self._try_source_tab_extraction(page)
             
             if source_code:
-                result['source_code'] = source_code.strip()
-                # Detect version and type
-                version_match = re.search(r'//@version=(\d+)', source_code)
-                result['version'] = version_match.group(1) if version_match else ''
-                result['is_strategy'] = 'strategy(' in source_code
+                self.strategy_hits[via] += 1
+                self._set_source(result, source_code)
+                if cacheable:
+                    self.source_cache.put(*cache_key, result['source_code'])
             
             return result
             
@@ -414,194 +1221,348 @@ class EnhancedTVScraper:
             result['error'] = str(e)[:100]
             return result
 
-    async def _try_source_tab_extraction(self) -> str:
-        """Try clicking Source Code tab and extracting."""
+    @staticmethod
+    def _set_source(result: dict, source_code: str):
+        """Store source code on a result and detect version and type."""
+        result['source_code'] = source_code.strip()
+        version_match = _PINE_VERSION.search(source_code)
+        result['version'] = version_match.group(1) if version_match else ''
+        result['is_strategy'] = 'strategy(' in source_code
+
+    def _note_headers(self, headers: dict):
+        """
+        Push back the next allowed request time from rate-limit headers:
+        Retry-After, or X-RateLimit-Reset once X-RateLimit-Remaining is
+        nearly spent (<= 2 or <= 10% of X-RateLimit-Limit).
+        """
+        now = time.monotonic()
+        wait = 0.0
+        if 'retry-after' in headers:
+            wait = parse_retry_after(headers['retry-after'], default=0.0)
         try:
-            # Human-like behavior before clicking
-            await self._human_like_mouse_move()
-            await self._human_like_delay(200, 500)
+            remaining = int(headers['x-ratelimit-remaining'])
+            limit = int(headers.get('x-ratelimit-limit', 0))
+            reset = float(headers['x-ratelimit-reset'])
+        except (KeyError, ValueError):
+            pass
+        else:
+            if remaining <= 2 or (limit and remaining <= limit * 0.1):
+                # Reset is either epoch seconds or seconds from now
+                wait = max(wait, reset - time.time() if reset > 1e9 else reset)
+        if wait > 0:
+            self._next_ok_at = max(self._next_ok_at, now + wait)
 
-            # Find and click Source Code tab
-            tab_selectors = [
-                '[role="tab"]:has-text("Source code")',
-                'button:has-text("Source code")',
-                'div:has-text("Source code"):not(:has(*))',
-            ]
+    async def _wait_for_rate_window(self):
+        """Sleep until the server's advertised rate window allows another request."""
+        delay = self._next_ok_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
 
-            for selector in tab_selectors:
-                try:
-                    tab = self.page.locator(selector)
-                    if await tab.count() > 0:
-                        # Move mouse near the tab before clicking
-                        await self._human_like_delay(100, 300)
-                        await tab.first.click()
-                        await self.page.wait_for_timeout(random.randint(2000, 3000))
-                        break
-                except:
-                    continue
-            
-            # Extract code - FIXED: Look for container with many child divs (line-by-line code)
-            code = await self.page.evaluate('''() => {
-                // Find all divs and look for containers with many child divs
-                const allDivs = document.querySelectorAll('div');
-                
-                for (const container of allDivs) {
-                    const children = Array.from(container.children);
-                    
-                    // If this div has many child divs (50+), it might be the code container
-                    if (children.length > 50) {
-                        const texts = children.map(c => c.textContent?.trim() || '');
-                        const joined = texts.join('\\n');
-                        
-                        // Check if this looks like Pine Script
-                        if (joined.includes('//@version') && 
-                            (joined.includes('indicator(') || joined.includes('strategy('))) {
-                            // Filter out line numbers (pure numeric lines)
-                            const codeLines = texts.filter(t => t && !/^\\d+$/.test(t));
-                            return codeLines.join('\\n');
-                        }
-                    }
-                }
-                
-                // Fallback: Look for pre/code elements
-                const codeElements = document.querySelectorAll('pre code, pre');
-                for (const elem of codeElements) {
-                    const text = elem.textContent || '';
-                    if (text.includes('//@version') && text.length > 200) {
-                        return text;
-                    }
-                }
-                
-                return '';
-            }''')
-            
-            return code
-        except:
-            return ''
+    async def _goto(self, page, url: str):
+        """Navigate a script page within the connection ceiling."""
+        async with self._connections:
+            return await page.goto(url, wait_until='domcontentloaded', timeout=30000)
 
-    async def _try_direct_extraction(self) -> str:
-        """Try extracting code directly from page elements."""
+    async def _try_api_extraction(self, result: dict) -> bool:
+        """
+        Fetch source from TradingView's pine-facade JSON endpoint through the
+        shared HTTP client (no render). True on a hit, which needs the payload
+        to mark the script open-source; metadata it carries is filled in.
+        """
+        if not self.http or not result['script_id'] or self._api_misses >= API_MAX_MISSES:
+            return False
+        api_url = PINE_FACADE_URL.format(script_id=result['script_id'])
         try:
-            return await self.page.evaluate('''() => {
-                // Method 1: Look for containers with many child divs (line-by-line code)
-                const allDivs = document.querySelectorAll('div');
-                
-                for (const container of allDivs) {
-                    const children = Array.from(container.children);
-                    
-                    if (children.length > 50) {
-                        const texts = children.map(c => c.textContent?.trim() || '');
-                        const joined = texts.join('\\n');
-                        
-                        if (joined.includes('//@version') && 
-                            (joined.includes('indicator(') || joined.includes('strategy('))) {
-                            const codeLines = texts.filter(t => t && !/^\\d+$/.test(t));
-                            return codeLines.join('\\n');
-                        }
-                    }
-                }
-                
-                // Method 2: Look for any pre/code element with Pine Script content
-                const codeElements = document.querySelectorAll('pre, code, [class*="source"]');
-                
-                for (const elem of codeElements) {
-                    const text = elem.textContent || '';
-                    if (text.length > 100 && 
-                        (text.includes('//@version') || 
-                         text.includes('indicator(') || 
-                         text.includes('strategy(') ||
-                         text.includes('plot('))) {
-                        return text;
-                    }
-                }
-                return '';
-            }''')
-        except:
-            return ''
+            await self._wait_for_rate_window()
+            async with self._connections:
+                response = await self.http.get(api_url)
+            self._note_headers(response.headers)
+            if response.status in THROTTLE_STATUSES and self.rate_limiter:
+                self.rate_limiter.throttle(parse_retry_after(response.headers.get('retry-after')))
+            data = await response.json() if response.status == 200 else None
+        except (PlaywrightError, ValueError):
+            data = None
+        
+        # Only a broken endpoint counts as a miss (non-200, error, not JSON);
+        # a well-formed payload for a closed script shows it still works
+        if not isinstance(data, dict):
+            self._api_misses += 1
+            if self._api_misses == API_MAX_MISSES:
+                print(f"   ⚠️ pine-facade missed {API_MAX_MISSES} times in a row; rendering pages only")
+            return False
+        self._api_misses = 0
+        if not data.get('source') or not self._api_is_open(data):
+            return False
+        self._set_source(result, data['source'])
+        result['title'] = data.get('scriptName') or data.get('scriptTitle') or ''
+        author = data.get('author')
+        if isinstance(author, dict):
+            author = author.get('username')
+        result['author'] = author if isinstance(author, str) else ''
+        published = data.get('published') or data.get('created') or ''
+        result['published_date'] = published if isinstance(published, str) else ''
+        description = data.get('description')
+        result['description'] = description if isinstance(description, str) else ''
+        tags = data.get('tags')
+        if isinstance(tags, list):
+            result['tags'] = list(dict.fromkeys(t.strip() for t in tags if isinstance(t, str) and t.strip()))
+        boosts = data.get('likesCount', data.get('boosts'))
+        result['boosts'] = boosts if isinstance(boosts, int) else 0
+        return True
+
+    @staticmethod
+    def _api_is_open(data: dict) -> bool:
+        """Whether a pine-facade payload explicitly marks the script open-source."""
+        access = data.get('access', data.get('scriptAccess'))
+        if isinstance(access, str):
+            access = access.lower()
+        return access in API_OPEN_ACCESS or data.get('isOpenSource') is True
 
-    async def _try_embedded_extraction(self) -> str:
-        """Try extracting code from embedded page data."""
+    async def _scan_for_code(self, page) -> tuple[str, str]:
+        """(source, strategy) from one in-page scan; ('', '') when nothing is found."""
         try:
-            return await self.page.evaluate('''() => {
-                // Check for script data in page scripts
-                const scripts = document.querySelectorAll('script');
-                for (const script of scripts) {
-                    const content = script.textContent || '';
-                    // Look for Pine Script patterns in JSON data
-                    const match = content.match(/"source"\\s*:\\s*"([^"]+)"/);
-                    if (match) {
-                        const decoded = match[1]
-                            .replace(/\\\\n/g, '\\n')
-                            .replace(/\\\\t/g, '\\t')
-                            .replace(/\\\\"/g, '"');
-                        if (decoded.includes('//@version') || decoded.includes('indicator(')) {
-                            return decoded;
-                        }
-                    }
-                }
-                return '';
-            }''')
-        except:
-            return ''
-
-    def save_script(self, result: dict, category: str) -> Path:
-        """Save Pine Script to file with metadata."""
-        category_dir = self.output_dir / sanitize_filename(category)
-        category_dir.mkdir(parents=True, exist_ok=True)
+            found = await page.evaluate('window.__tvExtract.code()')
+            return found['code'], found['via']
+        except PlaywrightError:
+            return '', ''
+
+    async def _try_source_tab_extraction(self, page) -> tuple[str, str]:
+        """
+        Scan for code already on the page (rendered or embedded data) and only
+        click the Source Code tab, with its multi-second wait, when that misses.
+        """
+        source_code, via = await self._scan_for_code(page)
+        if source_code:
+            return source_code, via
         
+        clicked = False
+        try:
+            # Human-like behavior before clicking
+            if self.stealth:
+                await self._human_like_mouse_move(page)
+                await self._human_like_delay(300, 800)
+
+            # Find and click Source Code tab, most specific selector first;
+            # click(timeout=) finds and clicks in one call (no count() first)
+            for selector in SOURCE_TAB_SELECTORS:
+                try:
+                    await page.locator(selector).first.click(timeout=500)
+                except PlaywrightError:
+                    continue
+                clicked = True
+                # Until the code shows up rather than a fixed 2-3s
+                try:
+                    await page.wait_for_function(CODE_SHOWN_JS, polling=150, timeout=5000)
+                except PlaywrightTimeoutError:
+                    pass
+                break
+        except PlaywrightError:
+            pass  # Tab missing or not clickable
+        
+        if not clicked:
+            return '', ''
+        source_code, _ = await self._scan_for_code(page)
+        return source_code, 'source_tab' if source_code else ''
+
+    def _category_dir(self, category: str) -> Path:
+        """Category output folder, sanitized and created once per category."""
+        category_dir = self._category_dirs.get(category)
+        if category_dir is None:
+            category_dir = self.output_dir / sanitize_filename(category)
+            category_dir.mkdir(parents=True, exist_ok=True)
+            self._category_dirs[category] = category_dir
+        return category_dir
+
+    async def save_script(self, result: dict, category: str) -> Path:
+        """Save Pine Script to file with metadata (through the background writer)."""
         # Create filename
         safe_title = sanitize_filename(result['title'] or 'unknown')
         filename = f"{result['script_id']}_{safe_title}.pine"
-        filepath = category_dir / filename
-        
-        # Format tags for header
-        tags_str = ', '.join(result.get('tags', [])) if result.get('tags') else ''
-
-        # Build header with extended metadata
-        header = [
-            f"// Title: {result['title']}",
-            f"// Script ID: {result['script_id']}",
-            f"// Author: {result['author']}",
-            f"// URL: {result['url']}",
-            f"// Published: {result.get('published_date', '')}",
-            f"// Downloaded: {datetime.now().isoformat()}",
-            f"// Pine Version: {result['version']}",
-            f"// Type: {'Strategy' if result['is_strategy'] else 'Indicator'}",
-            f"// Boosts: {result.get('boosts', 0)}",
-            f"// Tags: {tags_str}",
-            "//",
-            ""
-        ]
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(header))
-            f.write(result['source_code'])
+        if self.compress:
+            filename += '.zst'
+        filepath = self._category_dir(category) / filename
         
-        return filepath
+        # Header with extended metadata, then the code, in a single write
+        header = SCRIPT_HEADER.format_map({
+            'published_date': '',
+            'boosts': 0,
+            **result,
+            'downloaded': datetime.now().isoformat(),
+            'kind': 'Strategy' if result['is_strategy'] else 'Indicator',
+            'tags_str': ', '.join(result.get('tags') or []),
+        })
+        # Encoded here, so the writer only moves bytes
+        return await self._queue_write(filepath, (header + result['source_code']).encode('utf-8'))
 
-    def save_progress(self, category: str):
-        """Save progress to JSON for resuming."""
-        progress_path = self.output_dir / sanitize_filename(category) / '.progress.json'
-        progress_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(progress_path, 'w') as f:
-            json.dump({
-                'stats': self.stats,
-                'results': self.results,
-                'timestamp': datetime.now().isoformat()
-            }, f, indent=2)
-
-    def load_progress(self, category: str) -> set:
-        """Load previous progress. Returns set of completed URLs."""
-        progress_path = self.output_dir / sanitize_filename(category) / '.progress.json'
-        if progress_path.exists():
+    async def _queue_write(self, path: Path, data: bytes) -> Path:
+        """Hand a file to the writer task and wait until it is on disk (raises the write error if not)."""
+        if self._writer_task is None:
+            self._write_queue = asyncio.Queue(maxsize=100)
+            self._writer_task = asyncio.create_task(self._writer_loop())
+        written = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((path, data, written))
+        return await written
+
+    async def _writer_loop(self):
+        """Drain queued writes in a thread so disk I/O never blocks the event loop."""
+        while (item := await self._write_queue.get()) is not None:
+            path, data, written = item
             try:
-                with open(progress_path) as f:
-                    data = json.load(f)
-                    return {r['url'] for r in data.get('results', [])}
-            except:
-                pass
-        return set()
+                await asyncio.to_thread(self._write_file, path, data)
+            except Exception as e:
+                # Any failure (disk, zstd, encoding) goes to that caller only;
+                # the writer keeps serving the queue
+                if not written.done():  # Caller may have been cancelled meanwhile
+                    written.set_exception(e)
+            else:
+                if not written.done():
+                    written.set_result(path)
+
+    def _write_file(self, path: Path, data: bytes):
+        with open_output(path, self.compress) as f:
+            f.write(data)
+
+    async def _stop_writer(self):
+        """Let queued writes finish, then stop the writer task."""
+        if self._writer_task is not None:
+            await self._write_queue.put(None)
+            await self._writer_task
+            self._writer_task = None
+
+    def open_progress_log(self, category: str):
+        """Open the append-only progress log (one JSON result per line)."""
+        progress_path = self._category_dir(category) / '.progress.jsonl'
+        self.progress_file = open(progress_path, 'ab', buffering=0)
+        self._bloom_path = progress_path.with_suffix('.bloom')
+        self._stats_path = progress_path.with_name('.progress-stats.json')
+
+    @staticmethod
+    def _progress_status(result: dict) -> str:
+        if result['is_protected']:
+            return 'protected'
+        if result['error']:
+            return 'error'
+        if result.get('dup_of'):
+            return 'duplicate'
+        return 'saved' if result['source_code'] else 'no_code'
+
+    def load_hashes(self) -> dict[str, str]:
+        """Content hashes of every script saved under output_dir (any category)."""
+        hashes = {}
+        path = self.output_dir / '.hashes'
+        if path.exists():
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    digest, _, script_id = line.rstrip('\n').partition(' ')
+                    hashes.setdefault(digest, script_id)
+        return hashes
+
+    def find_duplicate(self, result: dict) -> str | None:
+        """
+        Hash the source and return the ID of an already-saved (or being
+        saved) script with identical code; otherwise reserve the hash for
+        this script in memory and return None. record_hash() persists it
+        once the file is written, release_hash() drops it if not.
+        """
+        digest = hashlib.blake2b(result['source_code'].encode('utf-8'), digest_size=16).hexdigest()
+        result['content_hash'] = digest
+        original = self.content_hashes.get(digest)
+        if original is not None and original != result['script_id']:
+            return original
+        if original is None:
+            self.content_hashes[digest] = result['script_id']
+            result['new_hash'] = True
+        return None
+
+    def release_hash(self, result: dict):
+        """Forget a hash reserved by find_duplicate() whose save failed."""
+        if result.pop('new_hash', False):
+            self.content_hashes.pop(result['content_hash'], None)
+
+    def record_hash(self, result: dict):
+        """Append a saved script's new hash to output_dir/.hashes (blocking; run in a thread)."""
+        if result.pop('new_hash', False):
+            with open(self.output_dir / '.hashes', 'a', encoding='utf-8') as f:
+                f.write(f"{result['content_hash']} {result['script_id']}\n")
+
+    def append_progress(self, result: dict):
+        """Record one finished script in the progress log (compact: no source)."""
+        if self.progress_file:
+            self.progress_file.write(dumps_line({
+                'url': result['url'],
+                'id': result['script_id'],
+                'status': self._progress_status(result),
+                'ts': datetime.now().isoformat(timespec='seconds'),
+            }))
+        if self.completed is not None and result['url'] not in self.completed:
+            self.completed.add(result['url'])
+
+    def save_progress_stats(self):
+        """Snapshot the running stats (small, so rewritten whole; atomic swap)."""
+        tmp_path = self._stats_path.with_suffix('.tmp')
+        tmp_path.write_bytes(dumps_pretty(self.stats | {'ts': datetime.now().isoformat(timespec='seconds')}))
+        os.replace(tmp_path, self._stats_path)
+
+    def close_progress_log(self):
+        """Flush the progress log to disk and close it; persist the URL filter and stats."""
+        if self.progress_file:
+            self.save_progress_stats()
+            os.fsync(self.progress_file.fileno())
+            self.progress_file.close()
+            self.progress_file = None
+            if self.completed is not None:
+                self.completed.save(self._bloom_path)
+
+    def _migrate_progress_json(self, category_dir: Path):
+        """Fold a legacy .progress.json into the JSONL log, then retire it."""
+        legacy_path = category_dir / '.progress.json'
+        if not legacy_path.exists():
+            return
+        try:
+            with open(legacy_path) as f:
+                results = json.load(f).get('results', [])
+        except (OSError, ValueError):
+            results = []
+        with open(category_dir / '.progress.jsonl', 'ab') as f:
+            for r in results:
+                if 'url' in r:
+                    f.write(dumps_line({'url': r['url'], 'id': r.get('script_id', ''),
+                                        'status': 'migrated', 'ts': ''}))
+        legacy_path.unlink()
+        # The filter may predate these URLs; rebuild it from the log
+        (category_dir / '.progress.bloom').unlink(missing_ok=True)
+
+    def load_progress(self, category: str) -> BloomFilter:
+        """
+        Load previous progress as a bloom filter of completed URLs. The filter
+        is persisted next to the progress log and rebuilt from the log only
+        when missing or outgrown.
+        """
+        category_dir = self._category_dir(category)
+        self._migrate_progress_json(category_dir)
+        bloom_path = category_dir / '.progress.bloom'
+        if bloom_path.exists():
+            bloom = BloomFilter.load(bloom_path)
+            if bloom and not bloom.saturated:
+                return bloom
+        
+        # Only the URL of each record is kept; a set drops repeats up front
+        completed = set()
+        log_path = category_dir / '.progress.jsonl'
+        if log_path.exists():
+            loads = orjson.loads if orjson is not None else json.loads
+            with open(log_path, 'rb') as f:
+                for line in f:
+                    try:
+                        completed.add(loads(line)['url'])
+                    except (ValueError, KeyError):
+                        continue  # Torn last line from an interrupted run
+        
+        # Room to grow so the rebuilt filter isn't saturated again next run
+        bloom = BloomFilter(capacity=max(10000, 2 * len(completed)), bits_per_item=16)
+        for url in completed:
+            bloom.add(url)
+        return bloom
 
     async def download_all(self, base_url: str, max_pages: int = 20, 
                           delay: float = 2.0, resume: bool = True):
@@ -619,74 +1580,177 @@ class EnhancedTVScraper:
         print(f"  Output: {self.output_dir}")
         print(f"{'='*70}\n")
         
-        await self.setup()
+        # Counters cover this run only, even when the scraper is reused
+        self.reset_stats()
+        
+        # Reuse the browser if we're inside `async with scraper:`
+        owns_browser = self.browser is None
+        if owns_browser:
+            await self.setup()
+        self.results = self._new_results()
+        self._api_misses = 0
+        pool_pages = []
         
         try:
             # Load previous progress
-            completed_urls = self.load_progress(category) if resume else set()
+            # Always loaded so this run's URLs are added to the persisted filter
+            self.completed = self.load_progress(category)
+            completed_urls = self.completed if resume else set()
             if completed_urls:
                 print(f"📂 Resuming: {len(completed_urls)} scripts already processed\n")
+            self.open_progress_log(category)
+            if self.content_hashes is None:
+                self.content_hashes = self.load_hashes()
+            self.source_cache = SourceCache(self.output_dir / '.source_cache.sqlite')
             
             # Navigate and collect scripts
             print("📋 Collecting script list...")
-            await self.page.goto(base_url, wait_until='networkidle', timeout=60000)
-            await self.page.wait_for_timeout(2000)
+            response = await self.page.goto(base_url, wait_until='domcontentloaded', timeout=60000)
+            # 4xx (other than rate limiting) won't fix itself on retry
+            if response and 400 <= response.status < 500 and response.status != 429:
+                raise ListingUnavailableError(f"HTTP {response.status} for {base_url}")
+            # Until the first script card renders (bounded), not a blind 2s
+            try:
+                await self.page.wait_for_selector(SCRIPT_CARD_SELECTOR, state='attached', timeout=15000)
+            except PlaywrightTimeoutError:
+                pass
             await self.handle_cookie_consent()
+            # Persist consent so script-page contexts start with it already given
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            self.storage_state = await self.context.storage_state(path=self.state_path)
             
-            scripts = await self.get_scripts_from_listing(max_pages)
-            self.stats['total'] = len(scripts)
+            # Pipeline: the listing producer feeds a queue that download
+            # workers drain while scrolling continues
+            print(f"{'='*70}")
+            print(f"  Downloading ({self.concurrency} at a time) as scripts are found...")
+            print(f"{'='*70}\n")
             
-            # Filter already completed
-            scripts = [s for s in scripts if s['url'] not in completed_urls]
-            print(f"✓ Found {self.stats['total']} scripts, {len(scripts)} to process\n")
+            skipped = 0
+            queue = asyncio.Queue()
             
-            if not scripts:
-                print("Nothing new to download!")
-                return
+            async def producer():
+                nonlocal skipped
+                async for s in self.listing_scripts(base_url, max_pages):
+                    self.stats['total'] += 1
+                    # Skip already completed (this category or anywhere in known_ids)
+                    if s['url'] in completed_urls or extract_script_id(s['url']) in self.known_ids:
+                        skipped += 1
+                        continue
+                    await queue.put(s)
             
-            # Process each script
-            print(f"{'='*70}")
-            print(f"  Downloading...")
-            print(f"{'='*70}\n")
+            # Pages in the shared context (warm HTTP cache); the pool size
+            # caps pages in flight
+            pool = asyncio.Queue()
+            for _ in range(self.concurrency):
+                page = await self.context.new_page()
+                pool_pages.append(page)
+                pool.put_nowait(page)
+            # Pacing: about `concurrency` scripts per `delay` seconds at most,
+            # starting at half that and adapting to 429s
+            max_rate = self.concurrency / max(delay, 0.1)
+            self.rate_limiter = TokenBucket(rate=max_rate / 2, burst=self.concurrency,
+                                            max_rate=max_rate)
+            # Concurrency that backs off under server strain
+            aimd = AIMDController(maximum=self.concurrency)
+            lock = asyncio.Lock()
+            done = 0
             
-            for i, script_info in enumerate(scripts, 1):
-                url = script_info['url']
-                title = script_info.get('title', 'Unknown')[:50]
-
-                print(f"[{i}/{len(scripts)}] {title}...")
-
-                result = await self.extract_pine_source(url)
-                self.results.append(result)
-
-                if result['is_protected']:
-                    print(f"         ⊘ Protected/Invite-only")
-                    self.stats['skipped_protected'] += 1
-                    self.consecutive_failures = 0  # Protected scripts are not failures
-                elif result['error']:
-                    print(f"         ✗ Error: {result['error']}")
-                    self.stats['failed'] += 1
-                    self.consecutive_failures += 1  # Track failures for backoff
-                elif result['source_code']:
-                    filepath = self.save_script(result, category)
-                    print(f"         ✓ Saved ({len(result['source_code'])} chars)")
-                    self.stats['downloaded'] += 1
-                    self.consecutive_failures = 0  # Reset on success
-                else:
-                    print(f"         ⊘ No source code found")
-                    self.stats['skipped_no_code'] += 1
-                    self.consecutive_failures = 0  # No source is not a failure
-
-                # Save progress periodically
-                if i % 10 == 0:
-                    self.save_progress(category)
-
-                # Randomized delay between requests with backoff
-                if i < len(scripts):
-                    delay_seconds = self._get_random_delay()
-                    await self.page.wait_for_timeout(int(delay_seconds * 1000))
+            async def process(script_info: dict):
+                nonlocal done
+                for window in self._windows:
+                    await window.acquire()
+                await self.rate_limiter.acquire()
+                page = await pool.get()
+                try:
+                    url = script_info['url']
+                    async with aimd.slot():
+                        started = time.monotonic()
+                        try:
+                            async with self._host_slot(url):
+                                result = await self.extract_pine_source(url, page)
+                        except PlaywrightError as e:
+                            result = self._new_result(url)
+                            result['error'] = str(e)[:100]
+                        aimd.record(time.monotonic() - started, is_overload_error(result['error']))
+                    
+                    # Write before taking the result lock so several workers'
+                    # files are in the writer queue at once
+                    save_error = None
+                    if (result['source_code'] and not result['is_protected'] and not result['error']):
+                        if original := self.find_duplicate(result):
+                            result['dup_of'] = original
+                        else:
+                            try:
+                                await self.save_script(result, category)
+                            except Exception as e:
+                                # A failed write costs this script, not the whole run
+                                save_error = f"Save failed: {e}"[:100]
+                                self.release_hash(result)
+                            else:
+                                try:
+                                    await asyncio.to_thread(self.record_hash, result)
+                                except OSError:
+                                    pass  # Only costs deduplication on a later run
+                    
+                    async with lock:
+                        done += 1
+                        title = script_info.get('title', 'Unknown')[:50]
+                        print(f"[{done + skipped}/{self.stats['total']}] {title}...")
+                        
+                        if result['is_protected']:
+                            print(f"         ⊘ Protected/Invite-only")
+                            self.stats['skipped_protected'] += 1
+                        elif result['error']:
+                            print(f"         ✗ Error: {result['error']}")
+                            self.stats['failed'] += 1
+                        elif result.get('dup_of'):
+                            print(f"         ⊘ Same source as {result['dup_of']}")
+                            self.stats['skipped_duplicate'] += 1
+                        elif save_error:
+                            result['error'] = save_error
+                            print(f"         ✗ Error: {save_error}")
+                            self.stats['failed'] += 1
+                        elif result['source_code']:
+                            self.known_ids.add(result['script_id'])
+                            print(f"         ✓ Saved ({len(result['source_code'])} chars)")
+                            self.stats['downloaded'] += 1
+                        else:
+                            print(f"         ⊘ No source code found")
+                            self.stats['skipped_no_code'] += 1
+                        
+                        # Checkpoint on every completion; stats snapshot every 10
+                        self.append_progress(result)
+                        if done % 10 == 0:
+                            self.save_progress_stats()
+                        # The .pine file holds the code; only export fields are kept
+                        result['has_source'] = bool(result['source_code'])
+                        self._append_result(result)
+                finally:
+                    # Replace a page that crashed or was closed under us
+                    if page.is_closed():
+                        page = await self.context.new_page()
+                        pool_pages.append(page)
+                    pool.put_nowait(page)
             
-            # Final progress save
-            self.save_progress(category)
+            async def worker():
+                while (script_info := await queue.get()) is not None:
+                    await process(script_info)
+            
+            workers = asyncio.gather(*(worker() for _ in range(self.concurrency)))
+            try:
+                await producer()
+            except BaseException:
+                workers.cancel()
+                raise
+            # One sentinel per worker once the listing is exhausted
+            for _ in range(self.concurrency):
+                queue.put_nowait(None)
+            await workers
+            print(f"\n✓ Found {self.stats['total']} scripts ({skipped} already done)")
+            
+            if not done:
+                print("Nothing new to download!")
+                return
             
             # Export metadata
             self._export_metadata(category)
@@ -695,54 +1759,87 @@ class EnhancedTVScraper:
             self._print_summary(category)
             
         finally:
-            await self.cleanup()
+            # Final progress flush; also runs when interrupted (Ctrl-C, timeout)
+            self.close_progress_log()
+            if self.source_cache is not None:
+                self.source_cache.close()
+                self.source_cache = None
+            for page in pool_pages:
+                if not page.is_closed():
+                    await page.close()
+            if owns_browser:
+                await self.cleanup()
+
+    @staticmethod
+    def _new_results() -> dict[str, list]:
+        """Empty column store: one list per METADATA_FIELDS entry."""
+        return {field: [] for field in METADATA_FIELDS}
+
+    def _append_result(self, result: dict):
+        """Add one finished result's export fields (missing optional ones are None)."""
+        get = result.get
+        for field, column in self.results.items():
+            column.append(get(field))
+
+    @property
+    def result_count(self) -> int:
+        """Results recorded in this run."""
+        return len(self.results['url'])
+
+    def _result_rows(self):
+        """Export records rebuilt row by row from the columns (lazily)."""
+        return (dict(zip(METADATA_FIELDS, row)) for row in zip(*self.results.values()))
 
     def _export_metadata(self, category: str):
-        """Export all metadata to JSON."""
-        metadata_path = self.output_dir / sanitize_filename(category) / 'metadata.json'
+        """Export all metadata: JSON Lines by default, one indented JSON with --pretty-metadata."""
+        category_dir = self._category_dir(category)
+        suffix = '.zst' if self.compress else ''
         
-        export_data = {
-            'download_date': datetime.now().isoformat(),
-            'category': category,
-            'statistics': self.stats,
-            'scripts': []
-        }
-        
-        for r in self.results:
-            export_data['scripts'].append({
-                'script_id': r['script_id'],
-                'title': r['title'],
-                'author': r['author'],
-                'url': r['url'],
-                'version': r['version'],
-                'is_strategy': r['is_strategy'],
-                'is_protected': r['is_protected'],
-                'has_source': bool(r.get('source_code')),
-                'published_date': r.get('published_date', ''),
-                'description': r.get('description', ''),
-                'tags': r.get('tags', []),
-                'boosts': r.get('boosts', 0),
-                'error': r['error']
+        if self.pretty_metadata:
+            metadata_path = category_dir / f'metadata.json{suffix}'
+            header = dumps_pretty({
+                'download_date': datetime.now().isoformat(),
+                'category': category,
+                'statistics': self.stats,
             })
+            tmp_path = metadata_path.with_suffix('.tmp')
+            # Streamed: the header object is reopened and each script is
+            # encoded and written on its own (same layout as one big dump,
+            # constant memory). Encoded JSON has no raw newlines in strings,
+            # so re-indenting by replacing b'\n' is safe.
+            with open_output(tmp_path, self.compress) as f:
+                f.write(header[:-2] + b',\n  "scripts": [')
+                sep = b'\n    '
+                for row in self._result_rows():
+                    f.write(sep + dumps_pretty(row).replace(b'\n', b'\n    '))
+                    sep = b',\n    '
+                f.write(b'\n  ]\n}')
+        else:
+            # One record per line, encoded in chunks: one write (and one zstd
+            # call) per EXPORT_CHUNK records, never the whole file in memory
+            metadata_path = category_dir / f'metadata.jsonl{suffix}'
+            tmp_path = metadata_path.with_suffix('.tmp')
+            rows = self._result_rows()
+            with open_output(tmp_path, self.compress) as f:
+                while chunk := list(islice(rows, EXPORT_CHUNK)):
+                    f.write(b''.join(map(dumps_line, chunk)))
         
-        with open(metadata_path, 'w', encoding='utf-8') as f:
-            json.dump(export_data, f, indent=2, ensure_ascii=False)
+        # Atomic swap: a crash mid-write never leaves a truncated export
+        os.replace(tmp_path, metadata_path)
         
         print(f"\n📄 Metadata exported: {metadata_path}")
 
     def _print_summary(self, category: str):
-        """Print final summary."""
-        print(f"\n{'='*70}")
-        print(f"  SUMMARY")
-        print(f"{'='*70}")
-        print(f"  ✓ Downloaded:          {self.stats['downloaded']}")
-        print(f"  ⊘ Protected/Private:   {self.stats['skipped_protected']}")
-        print(f"  ⊘ No Source Found:     {self.stats['skipped_no_code']}")
-        print(f"  ✗ Failed:              {self.stats['failed']}")
-        print(f"  ─────────────────────────────────")
-        print(f"  Total Processed:       {len(self.results)}")
-        print(f"\n  Output: {self.output_dir / sanitize_filename(category)}")
-        print(f"{'='*70}\n")
+        """Print final summary (one write)."""
+        sys.stdout.write(_SUMMARY_TMPL.format_map(
+            self.stats | {
+                'total': self.result_count,
+                'strategies': ', '.join(f"{k}={v}" for k, v in self.strategy_hits.most_common()) or '-',
+                'out': self._category_dir(category),
+                'rule': '=' * 70,
+            }
+        ))
+        sys.stdout.flush()
 
 
 async def main():
@@ -751,23 +1848,48 @@ async def main():
     parser.add_argument('--output', '-o', default='./pinescript_downloads', help='Output directory')
     parser.add_argument('--max-pages', '-p', type=int, default=20, help='Max pages to scan')
     parser.add_argument('--delay', '-d', type=float, default=2.0, help='Delay between requests')
-    parser.add_argument('--visible', action='store_true', help='Show browser window')
-    parser.add_argument('--no-resume', action='store_true', help='Start fresh (ignore progress)')
+    parser.add_argument('--visible', action=argparse.BooleanOptionalAction, default=False,
+                        help='Show browser window')
+    parser.add_argument('--resume', action=argparse.BooleanOptionalAction, default=True,
+                        help='Skip scripts finished in an earlier run (--no-resume starts fresh)')
+    parser.add_argument('--concurrency', '-c', type=int, default=4, help='Scripts downloaded in parallel')
+    parser.add_argument('--stealth', action='store_true', help='Human-like mouse/scroll noise on script pages (slower)')
+    parser.add_argument('--per-host', type=int, default=4, help='Max in-flight requests per hostname')
+    parser.add_argument('--max-connections', type=int, default=100, help='Max simultaneous network requests')
+    parser.add_argument('--rpm', type=int, help='Hard cap on scripts started per minute')
+    parser.add_argument('--rps', type=int, help='Hard cap on scripts started per second')
+    parser.add_argument('--compress', choices=('none', 'zstd'), default='none',
+                        help='Compress .pine files and metadata (zstd needs: pip install zstandard)')
+    parser.add_argument('--pretty-metadata', action='store_true', help='Write indented metadata.json instead of metadata.jsonl')
     
     args = parser.parse_args()
+    if args.compress == 'zstd' and zstandard is None:
+        parser.error('--compress zstd requires the zstandard package (pip install zstandard)')
     
     scraper = EnhancedTVScraper(
         output_dir=args.output,
-        headless=not args.visible
+        headless=not args.visible,
+        concurrency=args.concurrency,
+        stealth=args.stealth,
+        pretty_metadata=args.pretty_metadata,
+        per_host=args.per_host,
+        max_connections=args.max_connections,
+        rpm=args.rpm,
+        rps=args.rps,
+        compress=args.compress == 'zstd'
     )
     
-    await scraper.download_all(
-        base_url=args.url,
-        max_pages=args.max_pages,
-        delay=args.delay,
-        resume=not args.no_resume
-    )
+    try:
+        await scraper.download_all(
+            base_url=args.url,
+            max_pages=args.max_pages,
+            delay=args.delay,
+            resume=args.resume
+        )
+    except ListingUnavailableError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
 
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    run(main())
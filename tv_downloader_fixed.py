@@ -18,30 +18,286 @@ import asyncio
 import json
 import os
 import re
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+
+# Never needed for text extraction (aborted at the route layer)
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+# Analytics/ad hosts (suffix match), blocked whatever the resource type
+BLOCKED_HOSTS = (
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+    'hotjar.com', 'segment.io', 'segment.com', 'facebook.net', 'scorecardresearch.com',
+)
+
+# Condition waits (instead of fixed sleeps); each is bounded by a timeout
+SCRIPT_LINK = 'a[href*="/script/"]'
+# The listing observer has queued new script links
+BATCH_READY_JS = "() => window.__tvBatch.length > 0"
+# Take (and clear) the queued script links
+DRAIN_BATCH_JS = "() => window.__tvBatch.splice(0)"
+# Script link count unchanged for 500ms (the "Show more" batch finished rendering)
+LINKS_SETTLED_JS = '''() => {
+    const n = document.querySelectorAll('a[href*="/script/"]').length;
+    const s = window.__tvSettle ||= {n: -1, t: 0};
+    if (n !== s.n) { s.n = n; s.t = Date.now(); return false; }
+    return Date.now() - s.t >= 500;
+}'''
+# How long a missing/hidden "Show more" button gets to re-render before the
+# listing is treated as complete (ms)
+SHOW_MORE_SETTLE_MS = 3000
+
+# Listing page: scan once, then a MutationObserver queues every script link
+# added later (e.g. by "Show more") into window.__tvBatch, each URL once
+LISTING_JS = '''() => {
+    if (window.__tvBatch) return;
+    const seen = window.__tvSeen ||= new Set();
+    const BADGE_LABELS = {
+        'invite-only': 'invite-only', 'invite-only script': 'invite-only',
+        'protected': 'protected', 'protected script': 'protected',
+        'open-source': 'open', 'open-source script': 'open',
+    };
+    window.__tvBatch = [];
+    
+    const add = link => {
+        const href = link.href;
+        if (href && !seen.has(href) && href.match(/\\/script\\/[a-zA-Z0-9]+-.+\\/?$/)) {
+            const title = link.textContent?.trim();
+            if (title && title.length > 3) {
+                seen.add(href);
+                // Access badge on the listing card, if the card shows one
+                // (only trusted when the card links to this one script)
+                const card = link.closest('article, li, [class*="card"]');
+                const single = card && Array.from(card.querySelectorAll('a[href*="/script/"]'))
+                    .every(a => a.href === href);
+                // An element whose whole text is the label; title and
+                // description text never count (a title like "Protected
+                // Script ..." is inside the link, descriptions are longer)
+                let badge = 'unknown';
+                if (single) {
+                    for (const el of card.querySelectorAll('span, div')) {
+                        if (el.contains(link) || link.contains(el)) continue;
+                        const kind = BADGE_LABELS[el.textContent.trim().toLowerCase()];
+                        if (kind) { badge = kind; break; }
+                    }
+                }
+                window.__tvBatch.push({ url: href, title: title.substring(0, 200), badge });
+            }
+        }
+    };
+    // Links inside an added node, or the link an added text node belongs to
+    const scan = node => {
+        const el = node.nodeType === 1 ? node : node.parentElement;
+        if (!el) return;
+        const link = el.closest('a[href*="/script/"]');
+        if (link) add(link);
+        el.querySelectorAll('a[href*="/script/"]').forEach(add);
+    };
+    
+    scan(document.body);
+    new MutationObserver(mutations => {
+        for (const m of mutations) m.addedNodes.forEach(scan);
+    }).observe(document.body, {childList: true, subtree: true});
+}'''
+
+# Consecutive failed "Show more" clicks before the listing is treated as done
+SHOW_MORE_ATTEMPTS = 3
+
+# Navigation: short timeout, retried with backoff, instead of one long hang
+NAV_ATTEMPTS = 3
+SCRIPT_NAV_TIMEOUT = 12000
+LISTING_NAV_TIMEOUT = 20000
+
+# In-page extraction helper, installed once per context (add_init_script):
+# metadata, Source code tab click and the code itself in one call
+EXTRACT_JS = '''
+window.__tvExtract = async () => {
+    const pageText = document.body.innerText;
+    const pageUpper = pageText.toUpperCase();
+    
+    // Get title
+    const h1 = document.querySelector('h1');
+    const title = h1 ? h1.textContent.trim() : '';
+    
+    // Get author
+    const authorLink = document.querySelector('a[href^="/u/"]');
+    const author = authorLink ? authorLink.textContent.replace('by ', '').trim() : '';
+    
+    // Check for OPEN-SOURCE indicator (this is the key fix!)
+    const isOpenSource = pageUpper.includes('OPEN-SOURCE SCRIPT') || 
+                        pageUpper.includes('OPEN-SOURCE') ||
+                        pageText.includes('Open-source script');
+    
+    // Check for invite-only or protected (these override open-source)
+    const isInviteOnly = pageText.toLowerCase().includes('invite-only');
+    const isProtected = pageText.toLowerCase().includes('protected script');
+    
+    const meta = {
+        title,
+        author,
+        isOpenSource: isOpenSource && !isInviteOnly && !isProtected,
+        isInviteOnly,
+        isProtected
+    };
+    if (!meta.isOpenSource) return {meta, source: null};
+    
+    // Find the code - it's in individual div elements
+    const findCode = () => {
+        // Look for containers with many child divs (line-by-line code)
+        for (const container of document.querySelectorAll('div')) {
+            // If this div has many child divs (50+), it might be the code container
+            if (container.children.length <= 50) continue;
+            
+            // Check if this looks like Pine Script (one read of the whole text)
+            const text = container.textContent;
+            if (!text.includes('//@version') ||
+                !(text.includes('indicator(') || text.includes('strategy('))) continue;
+            
+            // Only the matching container is split into lines;
+            // filter out line numbers (pure numeric lines)
+            const codeLines = [];
+            for (const child of container.children) {
+                const line = child.textContent?.trim();
+                if (line && !/^\\d+$/.test(line)) codeLines.push(line);
+            }
+            return codeLines.join('\\n');
+        }
+        
+        // Fallback: Look for pre/code elements
+        for (const elem of document.querySelectorAll('pre, code')) {
+            const text = elem.textContent || '';
+            if (text.includes('//@version') && text.length > 200) {
+                return text;
+            }
+        }
+        
+        return null;
+    };
+    
+    // Click on Source code tab
+    const tab = Array.from(document.querySelectorAll('[role="tab"]'))
+        .find(t => t.textContent.includes('Source code'));
+    if (tab) tab.click();
+    
+    // Wait for the code to render (or give up after 15s). Polled every
+    // 250ms: a full container scan per mutation batch would run hundreds
+    // of times while the tab renders
+    const source = findCode() || await new Promise(resolve => {
+        const deadline = Date.now() + 15000;
+        const timer = setInterval(() => {
+            const code = findCode();
+            if (code || Date.now() > deadline) {
+                clearInterval(timer);
+                resolve(code);
+            }
+        }, 250);
+    });
+    return {meta, source};
+};
+'''
+
+# Browser HTTP cache size (bytes)
+DISK_CACHE_BYTES = 200_000_000
+
+# Saves between rewrites of .cache.json (plus one at the end of the run)
+CACHE_FLUSH_EVERY = 25
+
+# Characters dropped from filenames (str.translate deletion table)
+_FN_INVALID = str.maketrans('', '', '<>:"/\\|?*[]')
+
+# Compiled once; used per script
+_LINE_NUM = re.compile(r'^\d+[^\S\n]*', re.MULTILINE)  # not across newlines
+_VERSION = re.compile(r'//@version=(\d+)')
+_SCRIPT_ID = re.compile(r'/script/([^-/]+)')
 
 
 def sanitize_filename(name: str) -> str:
     """Convert a string to a valid filename."""
-    name = re.sub(r'[<>:"/\\|?*\[\]]', '', name)
-    name = re.sub(r'\s+', '_', name)
+    # Drop invalid characters; each whitespace run becomes one underscore
+    name = '_'.join(name.translate(_FN_INVALID).split())
     name = name.strip('._')
     return name[:200] if len(name) > 200 else name or "unnamed_script"
 
 
 def extract_script_id(url: str) -> str:
     """Extract script ID from TradingView URL."""
-    match = re.search(r'/script/([^-/]+)', url)
+    match = _SCRIPT_ID.search(url)
     return match.group(1) if match else ""
 
 
+def new_result(script_url: str) -> dict:
+    """Empty result record for a script URL."""
+    return {
+        'url': script_url,
+        'script_id': extract_script_id(script_url),
+        'title': '',
+        'author': '',
+        'source_code': '',
+        'version': '',
+        'is_open_source': False,
+        'downloaded': False,
+        'error': None
+    }
+
+
+def metadata_entry(result: dict) -> dict:
+    """Metadata record for one script result."""
+    return {
+        'script_id': result['script_id'],
+        'title': result['title'],
+        'author': result['author'],
+        'url': result['url'],
+        'version': result['version'],
+        'is_open_source': result['is_open_source'],
+        'downloaded': result['downloaded'],
+        'error': result['error']
+    }
+
+
+class TokenBucket:
+    """Async token bucket: caps how many scripts start per second across all workers."""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.burst = max(1.0, rate)
+        self.tokens = self.burst
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a request may start."""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
 class TVPineScriptDownloader:
-    def __init__(self, output_dir: str = "./pinescript_downloads", headless: bool = True):
+    def __init__(self, output_dir: str = "./pinescript_downloads", headless: bool = True,
+                 concurrency: int = 4, force: bool = False, max_age_days: float | None = None,
+                 profile_dir: str | None = None):
         self.output_dir = Path(output_dir)
         self.headless = headless
+        # Script pages loaded in parallel, one page per worker
+        self.concurrency = max(1, concurrency)
+        # Per-script record of earlier runs (script_id -> downloaded/error/mtime/file);
+        # saved scripts are skipped unless forced or older than max_age_days
+        self.cache_path = self.output_dir / '.cache.json'
+        self.cache = {}
+        self.force = force
+        self.max_age = timedelta(days=max_age_days) if max_age_days is not None else None
+        # Persistent browser profile: TradingView's JS bundles stay in the
+        # HTTP cache between runs instead of being fetched cold every time
+        self.profile_dir = profile_dir
+        self.playwright = None
         self.browser = None
         self.context = None
         self.page = None
@@ -49,133 +305,154 @@ class TVPineScriptDownloader:
             'downloaded': 0,
             'skipped_protected': 0,
             'skipped_no_code': 0,
-            'failed': 0
+            'failed': 0,
+            'cached': 0
         }
         self.results = []
+        # Category folders already created this run
+        self._category_dirs: dict[str, Path] = {}
+        # results.jsonl, rewritten each run and appended one line per
+        # finished script (crash-safe); not metadata.jsonl, which the
+        # enhanced downloader writes with another schema
+        self._meta_fp = None
         
     async def setup(self):
         """Initialize browser."""
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=['--disable-blink-features=AutomationControlled', '--no-sandbox']
-        )
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
-        )
-        self.page = await self.context.new_page()
+        # One context for the whole run: every page shares its HTTP cache
+        args = ['--disable-blink-features=AutomationControlled', '--no-sandbox',
+                f'--disk-cache-size={DISK_CACHE_BYTES}']
+        context_options = {
+            'viewport': {'width': 1920, 'height': 1080},
+            'user_agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+        }
+        if self.profile_dir:
+            self.context = await self.playwright.chromium.launch_persistent_context(
+                self.profile_dir, headless=self.headless, args=args, **context_options
+            )
+        else:
+            self.browser = await self.playwright.chromium.launch(headless=self.headless, args=args)
+            self.context = await self.browser.new_context(**context_options)
+        await self.context.route('**/*', self._block_heavy_resources)
+        await self.context.add_init_script(EXTRACT_JS)
+        # A persistent context opens with a blank page; use it
+        self.page = self.context.pages[0] if self.context.pages else await self.context.new_page()
+
+    @staticmethod
+    async def _block_heavy_resources(route):
+        """Abort images, media, fonts, stylesheets and trackers; let everything else through."""
+        request = route.request
+        if (request.resource_type in BLOCKED_RESOURCE_TYPES
+                or (urlparse(request.url).hostname or '').endswith(BLOCKED_HOSTS)):
+            await route.abort()
+        else:
+            await route.continue_()
         
     async def cleanup(self):
         """Close browser."""
         if self.browser:
             await self.browser.close()
+        elif self.context:
+            await self.context.close()
         if self.playwright:
             await self.playwright.stop()
 
+    @staticmethod
+    async def _goto(page, url: str, timeout: int) -> bool:
+        """Navigate with retries on timeout; False if every attempt timed out."""
+        for attempt in range(NAV_ATTEMPTS):
+            try:
+                await page.goto(url, wait_until='domcontentloaded', timeout=timeout)
+                return True
+            except PlaywrightTimeoutError:
+                if attempt < NAV_ATTEMPTS - 1:
+                    await asyncio.sleep(1.5 * (attempt + 1))
+        return False
+
     async def collect_scripts(self, base_url: str, max_clicks: int = 30) -> list[dict]:
         """Collect all script links by clicking 'Show more'."""
         print(f"📋 Collecting scripts from: {base_url}")
         
-        await self.page.goto(base_url, wait_until='networkidle', timeout=60000)
-        await self.page.wait_for_timeout(3000)
+        # networkidle never settles on pages with live websockets; wait for
+        # the first script link instead
+        if not await self._goto(self.page, base_url, LISTING_NAV_TIMEOUT):
+            print(f"❌ Timed out loading {base_url}")
+            return []
+        try:
+            await self.page.locator(SCRIPT_LINK).first.wait_for(timeout=15000)
+        except PlaywrightTimeoutError:
+            pass
         
+        await self.page.evaluate(LISTING_JS)
         scripts = {}
         click_count = 0
+        click_failures = 0
         
         while click_count < max_clicks:
-            # Get current scripts
-            current = await self.page.evaluate('''() => {
-                const scripts = [];
-                const links = document.querySelectorAll('a[href*="/script/"]');
-                links.forEach(link => {
-                    const href = link.href;
-                    if (href && href.match(/\\/script\\/[a-zA-Z0-9]+-.+\\/?$/)) {
-                        const title = link.textContent?.trim();
-                        if (title && title.length > 3) {
-                            scripts.push({ url: href, title: title.substring(0, 200) });
-                        }
-                    }
-                });
-                return scripts;
-            }''')
+            # Scripts queued since the last round
+            current = await self.page.evaluate(DRAIN_BATCH_JS)
             
             # Add new scripts
             prev_count = len(scripts)
-            for s in current:
-                if s['url'] not in scripts:
-                    scripts[s['url']] = s
+            scripts.update((s['url'], s) for s in current)
             
             print(f"   Found {len(scripts)} scripts...", end='\r')
             
             # If no new scripts, try clicking show more
             if len(scripts) == prev_count:
+                show_more = self.page.locator('button:has-text("Show more")').first
                 try:
-                    show_more = self.page.locator('button:has-text("Show more")')
-                    if await show_more.count() > 0 and await show_more.first.is_visible():
-                        await show_more.first.click()
-                        await self.page.wait_for_timeout(2000)
-                        click_count += 1
-                    else:
+                    # No button (or a hidden one): it may be re-rendering after
+                    # the last batch, so give it a moment before calling the
+                    # listing complete
+                    if await show_more.count() == 0 or not await show_more.is_visible():
+                        try:
+                            await show_more.wait_for(state='visible', timeout=SHOW_MORE_SETTLE_MS)
+                        except PlaywrightTimeoutError:
+                            break
+                    await show_more.click(timeout=5000)
+                except PlaywrightError as e:
+                    # Transient (detached/covered button, slow page): retry a few times
+                    click_failures += 1
+                    print(f"\n   ⚠ Show more failed ({click_failures}/{SHOW_MORE_ATTEMPTS}): {str(e)[:80]}")
+                    if click_failures >= SHOW_MORE_ATTEMPTS:
                         break
-                except:
-                    break
+                    await asyncio.sleep(1)
+                    continue
+                click_failures = 0
+                # Until the observer queues new links, not a fixed 2s, then
+                # until the batch stops growing
+                try:
+                    await self.page.wait_for_function(BATCH_READY_JS, timeout=10000)
+                    await self.page.wait_for_function(LINKS_SETTLED_JS, polling=100, timeout=5000)
+                except PlaywrightTimeoutError:
+                    pass
+                click_count += 1
             else:
                 click_count = 0  # Reset if we found new scripts
-                
-            await self.page.wait_for_timeout(500)
         
         print(f"\n✓ Found {len(scripts)} unique scripts")
         return list(scripts.values())
 
-    async def extract_script(self, script_url: str) -> dict:
+    async def extract_script(self, script_url: str, page=None) -> dict:
         """Extract Pine Script source code from a script page."""
-        result = {
-            'url': script_url,
-            'script_id': extract_script_id(script_url),
-            'title': '',
-            'author': '',
-            'source_code': '',
-            'version': '',
-            'is_open_source': False,
-            'error': None
-        }
+        page = page or self.page
+        result = new_result(script_url)
         
         try:
-            await self.page.goto(script_url, wait_until='domcontentloaded', timeout=45000)
-            await self.page.wait_for_timeout(3000)
+            if not await self._goto(page, script_url, SCRIPT_NAV_TIMEOUT):
+                result['error'] = 'timeout'
+                return result
+            # Header rendered (returns as soon as it's there)
+            try:
+                await page.locator('h1').first.wait_for(timeout=10000)
+            except PlaywrightTimeoutError:
+                pass
             
-            # Extract metadata and check if open-source
-            metadata = await self.page.evaluate('''() => {
-                const pageText = document.body.innerText;
-                const pageUpper = pageText.toUpperCase();
-                
-                // Get title
-                const h1 = document.querySelector('h1');
-                const title = h1 ? h1.textContent.trim() : '';
-                
-                // Get author
-                const authorLink = document.querySelector('a[href^="/u/"]');
-                const author = authorLink ? authorLink.textContent.replace('by ', '').trim() : '';
-                
-                // Check for OPEN-SOURCE indicator (this is the key fix!)
-                const isOpenSource = pageUpper.includes('OPEN-SOURCE SCRIPT') || 
-                                    pageUpper.includes('OPEN-SOURCE') ||
-                                    pageText.includes('Open-source script');
-                
-                // Check for invite-only or protected (these override open-source)
-                const isInviteOnly = pageText.toLowerCase().includes('invite-only');
-                const isProtected = pageText.toLowerCase().includes('protected script');
-                
-                return {
-                    title,
-                    author,
-                    isOpenSource: isOpenSource && !isInviteOnly && !isProtected,
-                    isInviteOnly,
-                    isProtected
-                };
-            }''')
+            # Metadata, Source code tab click and code in one round-trip (EXTRACT_JS)
+            extracted = await page.evaluate('__tvExtract()')
             
+            metadata = extracted['meta']
             result['title'] = metadata['title']
             result['author'] = metadata['author']
             result['is_open_source'] = metadata['isOpenSource']
@@ -189,64 +466,13 @@ class TVPineScriptDownloader:
                     result['error'] = 'not open-source'
                 return result
             
-            # Click on Source code tab
-            try:
-                source_tab = self.page.locator('[role="tab"]:has-text("Source code")')
-                if await source_tab.count() > 0:
-                    await source_tab.first.click()
-                    await self.page.wait_for_timeout(2500)
-            except Exception as e:
-                result['error'] = f'Could not click source tab: {str(e)[:50]}'
-                return result
-            
-            # Extract source code - the code is in individual div elements
-            source_code = await self.page.evaluate('''() => {
-                // Find all divs and look for containers with many child divs (line-by-line code)
-                const allDivs = document.querySelectorAll('div');
-                
-                for (const container of allDivs) {
-                    const children = Array.from(container.children);
-                    
-                    // If this div has many child divs (50+), it might be the code container
-                    if (children.length > 50) {
-                        const texts = children.map(c => c.textContent?.trim() || '');
-                        const joined = texts.join('\\n');
-                        
-                        // Check if this looks like Pine Script
-                        if (joined.includes('//@version') && 
-                            (joined.includes('indicator(') || joined.includes('strategy('))) {
-                            // Filter out line numbers (pure numeric lines)
-                            const codeLines = texts.filter(t => t && !/^\\d+$/.test(t));
-                            return codeLines.join('\\n');
-                        }
-                    }
-                }
-                
-                // Fallback: Look for pre/code elements
-                const codeElements = document.querySelectorAll('pre, code');
-                for (const elem of codeElements) {
-                    const text = elem.textContent || '';
-                    if (text.includes('//@version') && text.length > 200) {
-                        return text;
-                    }
-                }
-                
-                return null;
-            }''')
-            
+            source_code = extracted['source']
             if source_code:
-                # Clean up the code (remove line numbers if present)
-                lines = source_code.split('\n')
-                cleaned_lines = []
-                for line in lines:
-                    # Remove leading line numbers
-                    clean_line = re.sub(r'^\d+\s*', '', line)
-                    cleaned_lines.append(clean_line)
-                
-                result['source_code'] = '\n'.join(cleaned_lines)
+                # Clean up the code (remove leading line numbers, one pass)
+                result['source_code'] = _LINE_NUM.sub('', source_code)
                 
                 # Extract version
-                version_match = re.search(r'//@version=(\d+)', result['source_code'])
+                version_match = _VERSION.search(result['source_code'])
                 result['version'] = version_match.group(1) if version_match else ''
             else:
                 result['error'] = 'Could not extract source code'
@@ -260,10 +486,50 @@ class TVPineScriptDownloader:
             result['error'] = str(e)[:100]
             return result
 
-    def save_script(self, result: dict, category: str) -> Path:
-        """Save Pine Script to file."""
-        category_dir = self.output_dir / sanitize_filename(category)
-        category_dir.mkdir(parents=True, exist_ok=True)
+    def load_cache(self) -> dict:
+        """Read the script cache; empty if missing or unreadable."""
+        try:
+            with open(self.cache_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self, cache: dict | None = None):
+        """Write the script cache (or a snapshot of it) atomically (temp file, then rename)."""
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.cache if cache is None else cache, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    def is_cached(self, url: str) -> bool:
+        """Saved by an earlier run, file still on disk, and fresh enough."""
+        if self.force:
+            return False
+        entry = self.cache.get(extract_script_id(url))
+        if not entry or not entry.get('downloaded'):
+            return False
+        if not (self.output_dir / entry.get('file', '')).is_file():
+            return False
+        if self.max_age is not None:
+            try:
+                return datetime.now() - datetime.fromisoformat(entry['mtime']) <= self.max_age
+            except (KeyError, ValueError):
+                return False
+        return True
+
+    def category_dir(self, category: str) -> Path:
+        """Output folder for a category, created on first use."""
+        category_dir = self._category_dirs.get(category)
+        if category_dir is None:
+            category_dir = self.output_dir / sanitize_filename(category)
+            category_dir.mkdir(parents=True, exist_ok=True)
+            self._category_dirs[category] = category_dir
+        return category_dir
+
+    async def save_script(self, result: dict, category: str) -> Path:
+        """Save Pine Script to file (written off the event loop)."""
+        category_dir = self.category_dir(category)
         
         safe_title = sanitize_filename(result['title'] or 'unknown')
         filename = f"{result['script_id']}_{safe_title}.pine"
@@ -280,13 +546,12 @@ class TVPineScriptDownloader:
             ""
         ]
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(header))
-            f.write(result['source_code'])
-        
+        # Encoded once, written with a single binary write (no text-mode layer)
+        payload = ('\n'.join(header) + result['source_code']).encode('utf-8')
+        await asyncio.to_thread(filepath.write_bytes, payload)
         return filepath
 
-    async def download_all(self, base_url: str, max_pages: int = 30, delay: float = 2.0):
+    async def download_all(self, base_url: str, max_pages: int = 30, rate: float = 0.5):
         """Main download method."""
         parsed = urlparse(base_url)
         path_parts = [p for p in parsed.path.strip('/').split('/') if p]
@@ -310,66 +575,167 @@ class TVPineScriptDownloader:
                 print("❌ No scripts found!")
                 return
             
-            # Download each script
+            # Listing cards marked invite-only/protected are never opened
+            locked = [s for s in scripts if s.get('badge') in ('invite-only', 'protected')]
+            if locked:
+                for script_info in locked:
+                    result = new_result(script_info['url'])
+                    result['title'] = script_info['title']
+                    result['error'] = script_info['badge']
+                    self.results.append(result)
+                self.stats['skipped_protected'] += len(locked)
+                print(f"⊘ {len(locked)} scripts marked invite-only/protected on the listing")
+                scripts = [s for s in scripts if s.get('badge') not in ('invite-only', 'protected')]
+            
+            # Skip scripts an earlier run already saved
+            self.cache = self.load_cache()
+            pending = [s for s in scripts if not self.is_cached(s['url'])]
+            self.stats['cached'] = len(scripts) - len(pending)
+            if self.stats['cached']:
+                print(f"📂 {self.stats['cached']} scripts already downloaded (--force to refetch)")
+            
+            # Truncated per run so reruns don't repeat records; locked scripts
+            # are recorded even when nothing is left to download
+            self._meta_fp = open(self.category_dir(category) / 'results.jsonl', 'w', encoding='utf-8')
+            for result in self.results:
+                self._meta_fp.write(json.dumps(metadata_entry(result), ensure_ascii=False) + '\n')
+            self._meta_fp.flush()
+            if not pending:
+                print("Nothing new to download!")
+                return
+            scripts = pending
+            
+            # Download with a pool of pages in the shared context; together
+            # the workers start at most `rate` scripts per second
             print(f"\n{'='*70}")
-            print(f"  Downloading {len(scripts)} scripts...")
+            print(f"  Downloading {len(scripts)} scripts ({self.concurrency} at a time)...")
             print(f"{'='*70}\n")
             
-            for i, script_info in enumerate(scripts, 1):
-                url = script_info['url']
-                title = script_info.get('title', 'Unknown')[:50]
-                
-                print(f"[{i}/{len(scripts)}] {title}...")
-                
-                result = await self.extract_script(url)
-                self.results.append(result)
-                
-                if result['source_code']:
-                    filepath = self.save_script(result, category)
-                    print(f"         ✓ Saved: {filepath.name[:60]}")
-                    self.stats['downloaded'] += 1
-                elif result['error'] in ['invite-only', 'protected', 'not open-source']:
-                    print(f"         ⊘ Skipped: {result['error']}")
-                    self.stats['skipped_protected'] += 1
-                else:
-                    print(f"         ✗ Failed: {result['error']}")
-                    self.stats['failed'] += 1
-                
-                if i < len(scripts):
-                    await self.page.wait_for_timeout(int(delay * 1000))
+            queue = asyncio.Queue()
+            for script_info in scripts:
+                queue.put_nowait(script_info)
+            lock = asyncio.Lock()
+            # Serializes cache flushes, in snapshot order
+            cache_lock = asyncio.Lock()
+            bucket = TokenBucket(max(rate, 0.01))
+            done = 0
+            unsaved = 0
+            
+            async def flush_cache(snapshot: dict):
+                async with cache_lock:
+                    try:
+                        await asyncio.to_thread(self.save_cache, snapshot)
+                    except OSError as e:
+                        print(f"         ⚠ .cache.json not updated: {e}")
+            
+            async def worker(page):
+                nonlocal done, unsaved
+                while not queue.empty():
+                    script_info = queue.get_nowait()
+                    await bucket.acquire()
+                    
+                    url = script_info['url']
+                    title = script_info.get('title', 'Unknown')[:50]
+                    try:
+                        result = await self.extract_script(url, page)
+                    except PlaywrightError as e:
+                        # Page crashed or closed under us: this script fails, the run goes on
+                        result = new_result(url)
+                        result['error'] = str(e)[:100]
+                    
+                    # One script's output lines stay together
+                    snapshot = None
+                    async with lock:
+                        done += 1
+                        self.results.append(result)
+                        print(f"[{done}/{len(scripts)}] {title}...")
+                        
+                        filepath = None
+                        if result['source_code']:
+                            try:
+                                filepath = await self.save_script(result, category)
+                            except OSError as e:
+                                # A failed write costs this script, not the whole category
+                                result['error'] = f"Save failed: {e}"[:100]
+                                result['source_code'] = ''
+                        
+                        if filepath:
+                            print(f"         ✓ Saved: {filepath.name[:60]}")
+                            self.stats['downloaded'] += 1
+                            self.cache[result['script_id']] = {
+                                'downloaded': True,
+                                'error': None,
+                                'mtime': datetime.now().isoformat(timespec='seconds'),
+                                'file': filepath.relative_to(self.output_dir).as_posix(),
+                            }
+                            # Rewritten every CACHE_FLUSH_EVERY saves, not per save;
+                            # the snapshot is written after the lock is released
+                            unsaved += 1
+                            if unsaved >= CACHE_FLUSH_EVERY:
+                                snapshot = dict(self.cache)
+                                unsaved = 0
+                            # The file is on disk; don't hold the code for the whole run
+                            result['downloaded'] = True
+                            result['source_code'] = ''
+                        elif result['error'] in ['invite-only', 'protected', 'not open-source']:
+                            print(f"         ⊘ Skipped: {result['error']}")
+                            self.stats['skipped_protected'] += 1
+                        else:
+                            print(f"         ✗ Failed: {result['error']}")
+                            self.stats['failed'] += 1
+                        
+                        try:
+                            self._meta_fp.write(json.dumps(metadata_entry(result), ensure_ascii=False) + '\n')
+                            self._meta_fp.flush()
+                        except OSError as e:
+                            print(f"         ⚠ results.jsonl not updated: {e}")
+                    
+                    if snapshot is not None:
+                        await flush_cache(snapshot)
+            
+            pages = [await self.context.new_page() for _ in range(min(self.concurrency, len(scripts)))]
+            try:
+                await asyncio.gather(*(worker(page) for page in pages))
+            finally:
+                if unsaved:
+                    await flush_cache(dict(self.cache))
+                for page in pages:
+                    await page.close()
             
             # Save metadata
-            self._save_metadata(category)
+            await self._save_metadata(category)
             
             # Print summary
             self._print_summary(category)
             
         finally:
+            if self._meta_fp:
+                self._meta_fp.close()
+                self._meta_fp = None
             await self.cleanup()
 
-    def _save_metadata(self, category: str):
-        """Save metadata to JSON."""
-        category_dir = self.output_dir / sanitize_filename(category)
-        category_dir.mkdir(parents=True, exist_ok=True)
-        
-        metadata = {
+    async def _save_metadata(self, category: str):
+        """Save metadata to JSON (written off the event loop)."""
+        header = json.dumps({
             'download_date': datetime.now().isoformat(),
             'category': category,
-            'stats': self.stats,
-            'scripts': [{
-                'script_id': r['script_id'],
-                'title': r['title'],
-                'author': r['author'],
-                'url': r['url'],
-                'version': r['version'],
-                'is_open_source': r['is_open_source'],
-                'downloaded': bool(r['source_code']),
-                'error': r['error']
-            } for r in self.results]
-        }
+            'stats': self.stats
+        }, indent=2, ensure_ascii=False)
+        path = self.category_dir(category) / 'metadata.json'
+        
+        # Streamed: each script entry is built and encoded on its own (same
+        # layout as one indented dump, without a second list of every entry)
+        def write():
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(header[:-2] + ',\n  "scripts": [')
+                sep = '\n    '
+                for r in self.results:
+                    entry = json.dumps(metadata_entry(r), indent=2, ensure_ascii=False)
+                    f.write(sep + entry.replace('\n', '\n    '))
+                    sep = ',\n    '
+                f.write('\n  ]\n}')
         
-        with open(category_dir / 'metadata.json', 'w', encoding='utf-8') as f:
-            json.dump(metadata, f, indent=2, ensure_ascii=False)
+        await asyncio.to_thread(write)
 
     def _print_summary(self, category: str):
         """Print summary."""
@@ -379,6 +745,7 @@ class TVPineScriptDownloader:
         print(f"  ✓ Downloaded:          {self.stats['downloaded']}")
         print(f"  ⊘ Protected/Private:   {self.stats['skipped_protected']}")
         print(f"  ✗ Failed:              {self.stats['failed']}")
+        print(f"  ↺ Already Downloaded:  {self.stats['cached']}")
         print(f"\n  Output: {self.output_dir / sanitize_filename(category)}")
         print(f"{'='*70}\n")
 
@@ -388,20 +755,30 @@ async def main():
     parser.add_argument('--url', '-u', required=True, help='TradingView scripts URL')
     parser.add_argument('--output', '-o', default='./pinescript_downloads', help='Output directory')
     parser.add_argument('--max-pages', '-p', type=int, default=30, help='Max show-more clicks')
-    parser.add_argument('--delay', '-d', type=float, default=2.0, help='Delay between downloads')
+    parser.add_argument('--rate', '-r', type=float, default=0.5, help='Max scripts started per second (all workers)')
+    # Older flag, kept working: seconds between script starts (= --rate 1/DELAY)
+    parser.add_argument('--delay', '-d', type=float, help='Deprecated: seconds between script starts (overrides --rate)')
     parser.add_argument('--visible', action='store_true', help='Show browser window')
+    parser.add_argument('--concurrency', '-c', type=int, default=4, help='Scripts downloaded in parallel')
+    parser.add_argument('--force', action='store_true', help='Re-download scripts saved by earlier runs')
+    parser.add_argument('--max-age-days', type=float, help='Re-download saved scripts older than this')
+    parser.add_argument('--profile-dir', help='Browser profile directory; keeps the HTTP cache between runs')
     
     args = parser.parse_args()
     
     downloader = TVPineScriptDownloader(
         output_dir=args.output,
-        headless=not args.visible
+        headless=not args.visible,
+        concurrency=args.concurrency,
+        force=args.force,
+        max_age_days=args.max_age_days,
+        profile_dir=args.profile_dir
     )
     
     await downloader.download_all(
         base_url=args.url,
         max_pages=args.max_pages,
-        delay=args.delay
+        rate=1 / args.delay if args.delay and args.delay > 0 else args.rate
     )
 
 
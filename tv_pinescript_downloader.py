@@ -16,21 +16,154 @@ Requirements:
 
 import argparse
 import asyncio
+import html
+import json
 import os
 import re
+import sqlite3
 import sys
 import time
+import traceback
+import types
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
 from urllib.parse import urlparse
-from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from playwright.async_api import async_playwright, Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+
+# Condition waits (instead of fixed sleeps); each is bounded by a timeout
+SCRIPT_CARD_LINK = 'article a[href*="/script/"]'
+# More script cards than the given count are in the DOM
+MORE_ARTICLES_JS = "n => document.querySelectorAll('article').length > n"
+# Whole script-page extraction in one round-trip: title and access flags,
+# then (open-source only) click the Source code tab in-page and poll until
+# the code is in the DOM. Resolves {title, isOpenSource, isInviteOnly,
+# isProtected, sourceCode}.
+EXTRACT_JS = r'''async () => {
+    const h1 = document.querySelector('h1');
+    const title = h1 ? h1.textContent.trim() : '';
+    
+    // Check for explicit OPEN-SOURCE indicator
+    const pageText = document.body.innerText;
+    const pageLower = pageText.toLowerCase();
+    const isInviteOnly = pageLower.includes('invite-only');
+    const isProtected = pageLower.includes('protected script');
+    const isOpenSource = pageText.toUpperCase().includes('OPEN-SOURCE') &&
+                         !isInviteOnly && !isProtected;
+    const result = {title, isOpenSource, isInviteOnly, isProtected, sourceCode: null};
+    if (!isOpenSource) return result;
+    
+    // Click the "Source code" tab (tab role, button, or a bare text div)
+    const candidates = [
+        ...document.querySelectorAll('[role="tab"], button'),
+        ...[...document.querySelectorAll('div')].filter(d => d.children.length === 0),
+    ];
+    const tab = candidates.find(el => el.textContent.includes('Source code'));
+    if (tab) tab.click();
+    
+    const findCode = () => {
+        // Containers with many child divs (line-by-line code)
+        for (const container of document.querySelectorAll('div')) {
+            if (container.children.length <= 50) continue;
+            // One read of the whole text before splitting into lines
+            const text = container.textContent;
+            if (!text.includes('//@version') ||
+                !(text.includes('indicator(') || text.includes('strategy('))) continue;
+            // Filter out line numbers (pure numeric lines)
+            const codeLines = [];
+            for (const child of container.children) {
+                const line = child.textContent?.trim();
+                if (line && !/^\d+$/.test(line)) codeLines.push(line);
+            }
+            return codeLines.join('\n');
+        }
+        // Fallback: pre/code elements
+        for (const elem of document.querySelectorAll('pre code, pre')) {
+            const text = elem.textContent || '';
+            if (text.includes('//@version') && text.length > 200) return text;
+        }
+        return null;
+    };
+    
+    // Poll until the tab's code renders (bounded like the old 10s wait)
+    const deadline = Date.now() + 10000;
+    while ((result.sourceCode = findCode()) === null && Date.now() < deadline) {
+        await new Promise(r => setTimeout(r, 150));
+    }
+    return result;
+}'''
+
+# Shared browser started with --serve; when set, runs attach to it over CDP
+# instead of launching their own Chromium
+BROWSER_ENV = 'TV_BROWSER_WS'
+LAUNCH_ARGS = [
+    '--disable-blink-features=AutomationControlled',
+    # Features a text scrape never uses
+    '--disable-gpu', '--disable-extensions', '--disable-background-networking',
+    '--mute-audio', '--blink-settings=imagesEnabled=false',
+    # Small /dev/shm in containers crashes tabs; sandbox needs privileges there
+    '--disable-dev-shm-usage', '--no-sandbox',
+]
+
+# Never needed for text extraction (aborted at the route layer)
+BLOCKED_RESOURCE_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+# Script page HTML: JSON data blocks (group 1) and title
+_JSON_SCRIPT = re.compile(r'<script[^>]*type="application/[^"]*json"[^>]*>(.*?)</script>', re.DOTALL)
+_H1 = re.compile(r'<h1[^>]*>(.*?)</h1>', re.DOTALL)
+_TAG = re.compile(r'<[^>]+>')
+
+# Keys that may hold a script's ID, and access values in embedded script data
+_ID_KEYS = ('scriptIdPart', 'scriptId', 'script_id', 'id')
+_OPEN_ACCESS = frozenset({1, '1', 'open', 'open_no_auth'})
+_CLOSED_ACCESS = frozenset({2, 3, '2', '3', 'closed', 'closed_no_auth', 'protected',
+                            'invite_only', 'invite-only'})
+
+# Compiled once; used per script
+_FN_STRIP = re.compile(r'[<>:"/\\|?*\[\]]')
+_FN_WS = re.compile(r'\s+')
+_SCRIPT_ID = re.compile(r'/script/([^-/]+)')
+_SCRIPT_NAME = re.compile(r'/script/[^-/]+-(.+?)/?$')
+
+# Saved or closed-source scripts aren't fetched again for this long
+CACHE_TTL = 30 * 86400
+# Script navigations before a worker's page is replaced by a fresh one
+# (a long-lived page keeps growing its DOM/JS heap)
+PAGE_MAX_USES = 50
+# Cookies and local storage carried between runs (consent, session), so
+# script pages don't start from a first-visit state every time
+STATE_FILE = '.tv_state.json'
+
+
+def disable_stack_capture() -> bool:
+    """
+    Stop Playwright from snapshotting the Python stack on every protocol call
+    (--fast). The snapshot is only used to decorate error messages, so errors
+    lose their Python call site. Returns False if this Playwright version
+    doesn't have the hook.
+    """
+    try:
+        from playwright._impl import _connection
+    except ImportError:
+        return False
+    if getattr(_connection, 'traceback', None) is not traceback:
+        return False
+    # Module-local stand-in for `traceback`: the same, minus extract_stack
+    shim = types.ModuleType('traceback')
+    shim.__dict__.update(traceback.__dict__)
+    shim.extract_stack = lambda f=None, limit=None: traceback.StackSummary()
+    _connection.traceback = shim
+    return True
 
 
 def sanitize_filename(name: str) -> str:
     """Convert a string to a valid filename."""
     # Remove or replace invalid characters
-    name = re.sub(r'[<>:"/\\|?*\[\]]', '', name)
-    name = re.sub(r'\s+', '_', name)
+    name = _FN_STRIP.sub('', name)
+    name = _FN_WS.sub('_', name)
     name = name.strip('._')
     # Limit length
     if len(name) > 200:
@@ -41,45 +174,169 @@ def sanitize_filename(name: str) -> str:
 def extract_script_id(url: str) -> str:
     """Extract script ID from TradingView URL."""
     # URL format: https://www.tradingview.com/script/ABC123-Script-Name/
-    match = re.search(r'/script/([^-/]+)', url)
+    match = _SCRIPT_ID.search(url)
     return match.group(1) if match else ""
 
 
+def canonicalize_url(url: str) -> str:
+    """Dedupe key for a script URL: lowercase scheme/host without www., no
+    query, fragment or trailing slash."""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower().removeprefix('www.')
+    return f"{parsed.scheme.lower()}://{host}{parsed.path.rstrip('/')}"
+
+
+def find_script_data(node, script_id: str, depth: int = 0) -> dict | None:
+    """The object in parsed page data holding this script's "source" (matched by ID)."""
+    if depth > 12:
+        return None
+    if isinstance(node, dict):
+        if isinstance(node.get('source'), str) and any(
+                str(node.get(key)) == script_id for key in _ID_KEYS):
+            return node
+        children = node.values()
+    elif isinstance(node, list):
+        children = node
+    else:
+        return None
+    for child in children:
+        found = find_script_data(child, script_id, depth + 1)
+        if found is not None:
+            return found
+    return None
+
+
+def script_access(data: dict) -> bool | None:
+    """True/False when embedded script data marks it open-source or not; None if it doesn't say."""
+    for key in ('isOpenSource', 'is_open_source'):
+        if isinstance(data.get(key), bool):
+            return data[key]
+    access = data.get('access', data.get('scriptAccess'))
+    if isinstance(access, str):
+        access = access.lower()
+    if access in _OPEN_ACCESS:
+        return True
+    if access in _CLOSED_ACCESS:
+        return False
+    return None
+
+
 def extract_script_name(url: str) -> str:
     """Extract script name from TradingView URL."""
     # URL format: https://www.tradingview.com/script/ABC123-Script-Name/
-    match = re.search(r'/script/[^-/]+-(.+?)/?$', url)
+    match = _SCRIPT_NAME.search(url)
     if match:
         return match.group(1).replace('-', ' ')
     return ""
 
 
+class RateLimiter:
+    """Minimum spacing between request starts, shared by all workers."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        """Wait until the next request may start."""
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+            self._next = max(now, self._next) + self.min_interval
+
+
+class ScrapeCache:
+    """Outcome of each script URL across runs (SQLite): 'ok', 'closed' or 'failed'."""
+
+    def __init__(self, path: Path):
+        self.conn = sqlite3.connect(path, isolation_level=None)  # autocommit
+        self.conn.execute('CREATE TABLE IF NOT EXISTS cache (url TEXT PRIMARY KEY, status TEXT, ts REAL)')
+
+    def is_fresh(self, url: str) -> bool:
+        """Saved or closed-source within CACHE_TTL (failures are always retried)."""
+        row = self.conn.execute('SELECT status, ts FROM cache WHERE url = ?', (url,)).fetchone()
+        return bool(row) and row[0] in ('ok', 'closed') and time.time() - row[1] < CACHE_TTL
+
+    def put(self, url: str, status: str):
+        self.conn.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?)', (url, status, time.time()))
+
+    def close(self):
+        self.conn.close()
+
+
 class TradingViewScraper:
-    def __init__(self, output_dir: str = "./pinescript_downloads", headless: bool = True):
+    def __init__(self, output_dir: str = "./pinescript_downloads", headless: bool = True,
+                 concurrency: int = 8, retries: int = 3, backoff: float = 1.0):
         self.output_dir = Path(output_dir)
         self.headless = headless
+        # Script pages loaded in parallel, one page per worker
+        self.concurrency = max(1, concurrency)
+        # Attempts per script page on timeout, waiting backoff * 2**n between
+        self.retries = max(1, retries)
+        self.backoff = backoff
         self.browser = None
         self.context = None
         self.page = None
+        self.http = None
         self.downloaded_count = 0
-        self.failed_scripts = []
-        self.skipped_scripts = []
+        self.cached_count = 0
+        # Only counts stay in memory; each outcome is appended to
+        # manifest.jsonl as it happens (this run starts at _outcomes_start)
+        self.failed_count = 0
+        self.skipped_count = 0
+        self._outcomes = None
+        self._outcomes_path = None
+        self._outcomes_start = 0
         
     async def setup(self):
         """Initialize the browser."""
         self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=self.headless,
-            args=['--disable-blink-features=AutomationControlled']
-        )
+        endpoint = os.environ.get(BROWSER_ENV)
+        if endpoint:
+            # Warm browser from --serve; close() below then only drops our
+            # context and the connection, the browser keeps running
+            print(f"🔌 Using shared browser at {endpoint}")
+            self.browser = await self.playwright.chromium.connect_over_cdp(endpoint)
+        else:
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                args=LAUNCH_ARGS
+            )
+        state = self.output_dir / STATE_FILE
         self.context = await self.browser.new_context(
             viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+            user_agent=USER_AGENT,
+            storage_state=state if state.exists() else None
         )
+        await self.context.route('**/*', self._block_heavy_resources)
         self.page = await self.context.new_page()
+        # Plain HTTP client for script pages (no render); pages are the fallback
+        self.http = await self.playwright.request.new_context(
+            user_agent=USER_AGENT,
+            extra_http_headers={'Accept': 'text/html'},
+            timeout=15000
+        )
+
+    @staticmethod
+    async def _block_heavy_resources(route):
+        """Abort images, media, fonts and stylesheets; let everything else through."""
+        if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+            await route.abort()
+        else:
+            await route.continue_()
         
     async def cleanup(self):
         """Close browser and cleanup."""
+        if self.http:
+            await self.http.dispose()
+        if self.context:
+            try:
+                self.output_dir.mkdir(parents=True, exist_ok=True)
+                await self.context.storage_state(path=self.output_dir / STATE_FILE)
+            except PlaywrightError:
+                pass
         if self.browser:
             await self.browser.close()
         if self.playwright:
@@ -89,25 +346,35 @@ class TradingViewScraper:
         """Extract all script links from the current page."""
         scripts = await self.page.evaluate('''() => {
             const scripts = [];
+            const seen = new Set();
             const articles = document.querySelectorAll('article');
             
             articles.forEach(article => {
                 // Get the first link with /script/ in it (the title link)
                 const titleLink = article.querySelector('a[href*="/script/"]');
                 if (titleLink) {
-                    const href = titleLink.href;
+                    // Query/fragment dropped so ?foo=bar and #chart variants
+                    // of one script share a URL (and a cache key)
+                    const u = new URL(titleLink.href);
+                    const href = u.origin + u.pathname.replace(/\/?$/, '/');
                     const title = titleLink.textContent?.trim() || '';
                     
                     // Check if it's marked as open-source (has Pine Script indicator badge)
                     const isPineScript = article.querySelector('[class*="Pine"]') !== null ||
                                         article.textContent?.includes('Pine Script');
                     
-                    // Avoid duplicates by checking href
-                    if (href && !scripts.some(s => s.url === href)) {
+                    // ID and name parsed here, once (same as extract_script_id/_name)
+                    const m = href.match(/\/script\/([^-\/]+)(?:-(.+?))?\/?$/);
+                    // Avoid duplicates by script ID (the slug part may differ)
+                    const key = m ? m[1] : href;
+                    if (!seen.has(key)) {
+                        seen.add(key);
                         scripts.push({
                             url: href,
                             title: title,
-                            isPineScript: isPineScript
+                            isPineScript: isPineScript,
+                            scriptId: m ? m[1] : '',
+                            scriptName: m && m[2] ? m[2].replace(/-/g, ' ') : ''
                         });
                     }
                 }
@@ -123,8 +390,13 @@ class TradingViewScraper:
             # Look for the "Show more publications" button
             show_more_btn = self.page.locator('button:has-text("Show more")')
             if await show_more_btn.count() > 0:
+                article_count = await self.page.locator('article').count()
                 await show_more_btn.first.click()
-                await self.page.wait_for_timeout(2000)  # Wait for content to load
+                # Wait for the new cards, not a fixed 2s
+                try:
+                    await self.page.wait_for_function(MORE_ARTICLES_JS, arg=article_count, timeout=10000)
+                except PlaywrightTimeoutError:
+                    pass
                 return True
         except Exception:
             pass
@@ -134,10 +406,16 @@ class TradingViewScraper:
         """Collect all script links from a listing page, handling pagination."""
         print(f"\n📋 Collecting scripts from: {base_url}")
         
-        await self.page.goto(base_url, wait_until='networkidle', timeout=60000)
-        await self.page.wait_for_timeout(3000)
+        # networkidle never settles on pages with live websockets; wait for
+        # the first script card instead
+        await self.page.goto(base_url, wait_until='domcontentloaded', timeout=60000)
+        try:
+            await self.page.locator(SCRIPT_CARD_LINK).first.wait_for(timeout=30000)
+        except PlaywrightTimeoutError:
+            pass
         
-        all_scripts = []
+        all_scripts: list[dict] = []
+        seen: set[str] = set()
         page_num = 1
         
         while page_num <= max_pages:
@@ -145,7 +423,13 @@ class TradingViewScraper:
             
             # Get scripts from current view
             scripts = await self.get_script_links_from_page()
-            new_scripts = [s for s in scripts if s['url'] not in [x['url'] for x in all_scripts]]
+            # Keyed by script ID so slug/slash/query variants collapse
+            new_scripts = []
+            for s in scripts:
+                key = s['scriptId'] or canonicalize_url(s['url'])
+                if key not in seen:
+                    seen.add(key)
+                    new_scripts.append(s)
             all_scripts.extend(new_scripts)
             
             print(f"      Found {len(new_scripts)} new scripts (Total: {len(all_scripts)})")
@@ -156,145 +440,137 @@ class TradingViewScraper:
                 break
                 
             page_num += 1
-            await self.page.wait_for_timeout(1500)
         
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_scripts = []
-        for s in all_scripts:
-            if s['url'] not in seen:
-                seen.add(s['url'])
-                unique_scripts.append(s)
+        print(f"\n✓ Collected {len(all_scripts)} unique scripts")
+        return all_scripts
+
+    async def extract_source_code_http(self, script_url: str) -> tuple[str, str, bool | None]:
+        """
+        Fetch a script page over plain HTTP and take the source from this
+        script's own object in the JSON data embedded in its HTML.
+        Returns: (source_code, script_name, is_open_source); source_code is
+        only set when that object marks the script open-source, and
+        is_open_source is None when the page doesn't say (use the browser).
+        """
+        script_name = extract_script_name(script_url)
+        script_id = extract_script_id(script_url)
+        if not script_id:
+            return "", script_name, None
+        try:
+            response = await self.http.get(script_url)
+            if response.status != 200:
+                return "", script_name, None
+            page_html = await response.text()
+        except PlaywrightError:
+            return "", script_name, None
         
-        print(f"\n✓ Collected {len(unique_scripts)} unique scripts")
-        return unique_scripts
+        for match in _JSON_SCRIPT.finditer(page_html):
+            try:
+                data = find_script_data(json.loads(match.group(1)), script_id)
+            except (ValueError, RecursionError):
+                continue
+            if data is None:
+                continue
+            is_open_source = script_access(data)
+            source_code = data['source'] if is_open_source else ""
+            if is_open_source and not ('//@version' in source_code and
+                                       ('indicator(' in source_code or 'strategy(' in source_code)):
+                return "", script_name, None
+            title = _H1.search(page_html)
+            if title:
+                script_name = html.unescape(_TAG.sub('', title.group(1))).strip() or script_name
+            return source_code, script_name, is_open_source
+        return "", script_name, None
 
-    async def extract_source_code(self, script_url: str) -> tuple[str, str, bool]:
+    async def extract_source_code(self, script_url: str, page=None) -> tuple[str, str, bool | None]:
         """
-        Navigate to a script page and extract the Pine Script source code.
-        Returns: (source_code, script_name, is_open_source)
+        Navigate to a script page and extract the Pine Script source code,
+        retrying timeouts with exponential backoff. Returns:
+        (source_code, script_name, is_open_source), is_open_source being
+        what the page reported (None when extraction errored); raises
+        PlaywrightTimeoutError once every attempt has timed out.
         """
+        page = page or self.page
+        for attempt in range(1, self.retries + 1):
+            try:
+                return await self._extract_once(script_url, page)
+            except PlaywrightTimeoutError:
+                if attempt == self.retries:
+                    raise
+                wait = self.backoff * 2 ** (attempt - 1)
+                print(f"      ⚠️ Timeout loading {script_url}, retrying in {wait:.0f}s ({attempt}/{self.retries})")
+                await asyncio.sleep(wait)
+
+    async def _extract_once(self, script_url: str, page) -> tuple[str, str, bool | None]:
+        """One attempt of extract_source_code (timeouts propagate)."""
         script_name = extract_script_name(script_url)
         
         try:
-            await self.page.goto(script_url, wait_until='domcontentloaded', timeout=60000)
-            await self.page.wait_for_timeout(3000)
-            
-            # Get the actual script title from the page
-            title_element = await self.page.query_selector('h1')
-            if title_element:
-                script_name = await title_element.text_content()
-                script_name = script_name.strip() if script_name else script_name
-            
-            # Check if open-source (FIXED: look for explicit open-source indicator)
-            script_type = await self.page.evaluate('''() => {
-                const pageText = document.body.innerText;
-                const pageUpper = pageText.toUpperCase();
-                
-                // Check for explicit OPEN-SOURCE indicator
-                const isOpenSource = pageUpper.includes('OPEN-SOURCE SCRIPT') || 
-                                    pageUpper.includes('OPEN-SOURCE') ||
-                                    pageText.includes('Open-source script');
-                
-                // Check for invite-only or protected
-                const isInviteOnly = pageText.toLowerCase().includes('invite-only');
-                const isProtected = pageText.toLowerCase().includes('protected script');
-                
-                return {
-                    isOpenSource: isOpenSource && !isInviteOnly && !isProtected,
-                    isInviteOnly,
-                    isProtected
-                };
-            }''')
+            await page.goto(script_url, wait_until='domcontentloaded', timeout=60000)
+            # Header rendered (returns as soon as it's there)
+            try:
+                await page.locator('h1').first.wait_for(timeout=15000)
+            except PlaywrightTimeoutError:
+                pass
             
-            if not script_type['isOpenSource']:
-                return "", script_name, False
+            # Title, access check, tab click and code extraction in one call
+            info = await page.evaluate(EXTRACT_JS)
+            if info['title']:
+                script_name = info['title']
             
-            # Look for and click the "Source code" tab
-            source_tab_selectors = [
-                '[role="tab"]:has-text("Source code")',
-                'button:has-text("Source code")',
-                'div:has-text("Source code"):not(:has(*))',
-            ]
-            
-            source_tab = None
-            for selector in source_tab_selectors:
-                try:
-                    tab = self.page.locator(selector)
-                    if await tab.count() > 0:
-                        source_tab = tab.first
-                        break
-                except Exception:
-                    continue
-            
-            if source_tab:
-                await source_tab.click()
-                await self.page.wait_for_timeout(2500)
-            
-            # FIXED: Extract source code by finding div container with many children
-            source_code = await self.page.evaluate('''() => {
-                // Find all divs and look for containers with many child divs (line-by-line code)
-                const allDivs = document.querySelectorAll('div');
-                
-                for (const container of allDivs) {
-                    const children = Array.from(container.children);
-                    
-                    // If this div has many child divs (50+), it might be the code container
-                    if (children.length > 50) {
-                        const texts = children.map(c => c.textContent?.trim() || '');
-                        const joined = texts.join('\\n');
-                        
-                        // Check if this looks like Pine Script
-                        if (joined.includes('//@version') && 
-                            (joined.includes('indicator(') || joined.includes('strategy('))) {
-                            // Filter out line numbers (pure numeric lines)
-                            const codeLines = texts.filter(t => t && !/^\\d+$/.test(t));
-                            return codeLines.join('\\n');
-                        }
-                    }
-                }
-                
-                // Fallback: Look for pre/code elements
-                const codeElements = document.querySelectorAll('pre code, pre');
-                for (const elem of codeElements) {
-                    const text = elem.textContent || '';
-                    if (text.includes('//@version') && text.length > 200) {
-                        return text;
-                    }
-                }
-                
-                return null;
-            }''')
-            
-            return source_code or "", script_name, bool(source_code)
+            # An open-source page whose code didn't render is still open-source
+            return info['sourceCode'] or "", script_name, info['isOpenSource']
             
         except PlaywrightTimeoutError:
-            print(f"      ⚠️ Timeout loading {script_url}")
-            return "", script_name, False
+            raise
         except Exception as e:
             print(f"      ⚠️ Error extracting source: {str(e)[:50]}")
-            return "", script_name, False
+            return "", script_name, None
+
+    def record_outcome(self, status: str, url: str, title: str, **extra):
+        """Append a 'failed' or 'skipped' script to manifest.jsonl."""
+        if status == 'failed':
+            self.failed_count += 1
+        else:
+            self.skipped_count += 1
+        self._outcomes.write(json.dumps({'status': status, 'url': url, 'title': title, **extra},
+                                        ensure_ascii=False) + '\n')
+
+    def run_outcomes(self, status: str):
+        """This run's manifest.jsonl entries with the given status, streamed from disk."""
+        with open(self._outcomes_path, encoding='utf-8') as f:
+            f.seek(self._outcomes_start)
+            for line in f:
+                entry = json.loads(line)
+                if entry['status'] == status:
+                    yield entry
 
-    def save_script(self, source_code: str, script_name: str, script_id: str, category: str):
-        """Save the Pine Script source code to a file."""
+    async def save_script(self, source_code: str, script_name: str, script_id: str, category: str):
+        """Save the Pine Script source code to a file (written off the event loop)."""
         # Create category subdirectory
         category_dir = self.output_dir / sanitize_filename(category)
-        category_dir.mkdir(parents=True, exist_ok=True)
         
         # Create filename
         safe_name = sanitize_filename(script_name)
         filename = f"{script_id}_{safe_name}.pine"
         filepath = category_dir / filename
         
-        # Save the file
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"// Script: {script_name}\n")
-            f.write(f"// ID: {script_id}\n")
-            f.write(f"// Downloaded: {datetime.now().isoformat()}\n")
-            f.write(f"// Source: TradingView\n")
-            f.write("//\n\n")
-            f.write(source_code)
+        # Header and code in one write
+        payload = (
+            f"// Script: {script_name}\n"
+            f"// ID: {script_id}\n"
+            f"// Downloaded: {datetime.now().isoformat()}\n"
+            f"// Source: TradingView\n"
+            "//\n\n"
+            f"{source_code}"
+        )
+        
+        def write():
+            category_dir.mkdir(parents=True, exist_ok=True)
+            with open(filepath, 'w', encoding='utf-8') as f:
+                f.write(payload)
         
+        await asyncio.to_thread(write)
         return filepath
 
     async def download_scripts(self, base_url: str, max_pages: int = 10, delay: float = 2.0):
@@ -324,82 +600,197 @@ class TradingViewScraper:
                 return
             
             # Create output directory
-            self.output_dir.mkdir(parents=True, exist_ok=True)
+            category_dir = self.output_dir / sanitize_filename(category)
+            category_dir.mkdir(parents=True, exist_ok=True)
+            # Line-buffered: every outcome is on disk as soon as it's written
+            self._outcomes_path = category_dir / 'manifest.jsonl'
+            self._outcomes = open(self._outcomes_path, 'a', encoding='utf-8', buffering=1)
+            self._outcomes_start = self._outcomes.tell()
+            
+            # Skip scripts already on disk ({script_id}_{name}.pine) or
+            # settled within CACHE_TTL in an earlier run
+            saved_ids = {p.name.split('_', 1)[0] for p in category_dir.glob('*.pine')}
+            cache = ScrapeCache(self.output_dir / '.scrape_cache.sqlite')
+            pending = [s for s in scripts
+                       if s['scriptId'] not in saved_ids and not cache.is_fresh(s['url'])]
+            self.cached_count = len(scripts) - len(pending)
+            if self.cached_count:
+                print(f"📂 Skipping {self.cached_count} scripts handled in an earlier run")
+            scripts = pending
             
             # Download each script
             print(f"\n{'='*60}")
-            print(f"Downloading {len(scripts)} scripts...")
+            print(f"Downloading {len(scripts)} scripts ({self.concurrency} at a time)...")
             print(f"{'='*60}\n")
             
-            for i, script_info in enumerate(scripts, 1):
-                url = script_info['url']
-                title = script_info.get('title', 'Unknown')
-                script_id = extract_script_id(url)
-                
-                print(f"[{i}/{len(scripts)}] {title[:50]}...")
-                
-                # Extract source code
-                source_code, script_name, is_open_source = await self.extract_source_code(url)
-                
-                if source_code:
-                    filepath = self.save_script(source_code, script_name, script_id, category)
-                    print(f"         ✓ Saved: {filepath.name}")
-                    self.downloaded_count += 1
-                elif not is_open_source:
-                    print(f"         ⊘ Skipped (closed source/protected)")
-                    self.skipped_scripts.append({'url': url, 'title': title, 'reason': 'closed source'})
-                else:
-                    print(f"         ✗ Failed to extract source code")
-                    self.failed_scripts.append({'url': url, 'title': title})
-                
-                # Delay between requests
-                if i < len(scripts):
-                    await self.page.wait_for_timeout(int(delay * 1000))
+            # A pool of pages in the shared context; each worker takes the
+            # next script from the queue. All scripts are on tradingview.com,
+            # so one limiter spaces every request start `delay` apart
+            queue = asyncio.Queue()
+            for script_info in scripts:
+                queue.put_nowait(script_info)
+            lock = asyncio.Lock()
+            limiter = RateLimiter(delay)
+            done = 0
+            
+            async def worker(slot):
+                nonlocal done
+                uses = 0
+                while not queue.empty():
+                    script_info = queue.get_nowait()
+                    await limiter.wait()
+                    
+                    url = script_info['url']
+                    title = script_info.get('title', 'Unknown')
+                    script_id = script_info['scriptId']
+                    
+                    # Extract source code: plain HTTP first, rendered page if that misses
+                    timed_out = False
+                    error = None
+                    source_code, script_name, is_open_source = "", title, None
+                    try:
+                        source_code, script_name, is_open_source = await self.extract_source_code_http(url)
+                        # Render unless HTTP found the source or the script's own data says closed
+                        if not source_code and is_open_source is not False:
+                            try:
+                                source_code, script_name, is_open_source = await self.extract_source_code(url, pages[slot])
+                            except PlaywrightTimeoutError:
+                                timed_out = True
+                            uses += 1
+                            if uses >= PAGE_MAX_USES:
+                                await recycle(slot)
+                                uses = 0
+                    except Exception as e:
+                        # Page crashed, recycle or HTTP failed: this script
+                        # fails, the other workers carry on
+                        error = str(e)[:100]
+                        source_code = ""
+                        if pages[slot].is_closed():
+                            try:
+                                await recycle(slot)
+                                uses = 0
+                            except PlaywrightError:
+                                pass  # Next script fails the same way and retries this
+                    
+                    # Counters and one script's output lines stay together
+                    async with lock:
+                        done += 1
+                        print(f"[{done}/{len(scripts)}] {title[:50]}...")
+                        
+                        filepath = None
+                        if source_code:
+                            try:
+                                filepath = await self.save_script(source_code, script_name, script_id, category)
+                            except OSError as e:
+                                error = f"Save failed: {e}"[:100]
+                        
+                        if filepath:
+                            print(f"         ✓ Saved: {filepath.name}")
+                            self.downloaded_count += 1
+                            cache.put(url, 'ok')
+                        elif error:
+                            print(f"         ✗ Failed: {error}")
+                            self.record_outcome('failed', url, title, error=error)
+                            cache.put(url, 'failed')
+                        elif timed_out:
+                            print(f"         ✗ Timed out after {self.retries} attempts")
+                            self.record_outcome('failed', url, title, attempts=self.retries)
+                            cache.put(url, 'failed')
+                        elif is_open_source is False:
+                            # Only when the page itself said invite-only/protected/not open-source
+                            print(f"         ⊘ Skipped (closed source/protected)")
+                            self.record_outcome('skipped', url, title, reason='closed source')
+                            cache.put(url, 'closed')
+                        else:
+                            print(f"         ✗ Failed to extract source code")
+                            self.record_outcome('failed', url, title)
+                            cache.put(url, 'failed')
+            
+            async def recycle(slot):
+                """Replace a worker's page with a fresh one in the same context."""
+                try:
+                    await pages[slot].close()
+                except PlaywrightError:
+                    pass  # Already closed or crashed
+                pages[slot] = await self.context.new_page()
+            
+            pages = [await self.context.new_page() for _ in range(min(self.concurrency, len(scripts)))]
+            try:
+                await asyncio.gather(*(worker(slot) for slot in range(len(pages))))
+            finally:
+                for page in pages:
+                    await page.close()
+                cache.close()
+                self._outcomes.close()
             
             # Print summary
-            self.print_summary(category)
+            await self.print_summary(category)
             
         finally:
             await self.cleanup()
 
-    def print_summary(self, category: str):
+    async def print_summary(self, category: str):
         """Print download summary."""
         print(f"\n{'='*60}")
         print("DOWNLOAD SUMMARY")
         print(f"{'='*60}")
         print(f"✓ Downloaded: {self.downloaded_count} scripts")
-        print(f"⊘ Skipped (protected): {len(self.skipped_scripts)} scripts")
-        print(f"✗ Failed: {len(self.failed_scripts)} scripts")
+        print(f"⊘ Skipped (protected): {self.skipped_count} scripts")
+        print(f"✗ Failed: {self.failed_count} scripts")
+        print(f"↺ Already done: {self.cached_count} scripts")
         print(f"\nOutput directory: {self.output_dir / sanitize_filename(category)}")
         
-        if self.failed_scripts:
+        if self.failed_count:
             print(f"\nFailed scripts:")
-            for script in self.failed_scripts[:10]:
+            for script in islice(self.run_outcomes('failed'), 10):
                 print(f"  - {script['title'][:50]}")
-            if len(self.failed_scripts) > 10:
-                print(f"  ... and {len(self.failed_scripts) - 10} more")
+            if self.failed_count > 10:
+                print(f"  ... and {self.failed_count - 10} more")
         
         # Save manifest
         manifest_path = self.output_dir / sanitize_filename(category) / "manifest.txt"
-        with open(manifest_path, 'w', encoding='utf-8') as f:
-            f.write(f"Download Summary\n")
-            f.write(f"================\n")
-            f.write(f"Date: {datetime.now().isoformat()}\n")
-            f.write(f"Category: {category}\n")
-            f.write(f"Downloaded: {self.downloaded_count}\n")
-            f.write(f"Skipped: {len(self.skipped_scripts)}\n")
-            f.write(f"Failed: {len(self.failed_scripts)}\n")
-            f.write(f"\n--- Failed Scripts ---\n")
-            for s in self.failed_scripts:
-                f.write(f"{s['url']}\n")
-            f.write(f"\n--- Skipped Scripts (Protected) ---\n")
-            for s in self.skipped_scripts:
-                f.write(f"{s['url']}\n")
+        header = [
+            "Download Summary",
+            "================",
+            f"Date: {datetime.now().isoformat()}",
+            f"Category: {category}",
+            f"Downloaded: {self.downloaded_count}",
+            f"Skipped: {self.skipped_count}",
+            f"Failed: {self.failed_count}",
+            f"Already done: {self.cached_count}",
+        ]
+        
+        # URL lists streamed from manifest.jsonl, never held in memory
+        def write():
+            with open(manifest_path, 'w', encoding='utf-8') as f:
+                f.write('\n'.join(header) + '\n')
+                f.write("\n--- Failed Scripts ---\n")
+                f.writelines(f"{s['url']}\n" for s in self.run_outcomes('failed'))
+                f.write("\n--- Skipped Scripts (Protected) ---\n")
+                f.writelines(f"{s['url']}\n" for s in self.run_outcomes('skipped'))
+        
+        await asyncio.to_thread(write)
         
         print(f"\nManifest saved: {manifest_path}")
         print(f"{'='*60}\n")
 
 
+async def serve(port: int, headless: bool = True):
+    """Keep one Chromium running for later runs to attach to (see BROWSER_ENV)."""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(
+            headless=headless,
+            args=LAUNCH_ARGS + [f'--remote-debugging-port={port}']
+        )
+        print(f"Browser ready. In another shell:")
+        print(f"  export {BROWSER_ENV}=http://127.0.0.1:{port}")
+        print("Press Ctrl+C to stop.")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await browser.close()
+
+
 async def main():
     parser = argparse.ArgumentParser(
         description='Download Pine Script indicators from TradingView',
@@ -419,7 +810,6 @@ Notes:
     
     parser.add_argument(
         '--url', '-u',
-        required=True,
         help='TradingView scripts listing URL (e.g., https://www.tradingview.com/scripts/luxalgo/)'
     )
     
@@ -443,6 +833,42 @@ Notes:
         help='Delay between downloads in seconds (default: 2.0)'
     )
     
+    parser.add_argument(
+        '--concurrency', '-c',
+        type=int,
+        default=8,
+        help='Scripts downloaded in parallel (default: 8)'
+    )
+    
+    parser.add_argument(
+        '--retries',
+        type=int,
+        default=3,
+        help='Attempts per script page when it times out (default: 3)'
+    )
+    
+    parser.add_argument(
+        '--backoff',
+        type=float,
+        default=1.0,
+        help='Base wait before a retry, doubled each attempt (default: 1.0)'
+    )
+    
+    parser.add_argument(
+        '--serve',
+        type=int,
+        nargs='?',
+        const=9222,
+        metavar='PORT',
+        help=f'Keep a browser running on PORT (default 9222) for other runs to share via {BROWSER_ENV}'
+    )
+    
+    parser.add_argument(
+        '--fast',
+        action='store_true',
+        help="Skip Playwright's per-call stack capture (less CPU, terser errors)"
+    )
+    
     parser.add_argument(
         '--headless',
         action='store_true',
@@ -458,16 +884,28 @@ Notes:
     
     args = parser.parse_args()
     
+    if args.serve:
+        await serve(args.serve, headless=not args.visible)
+        return
+    
     # Validate URL
+    if not args.url:
+        parser.error('--url is required (unless --serve)')
     if 'tradingview.com' not in args.url:
         print("Error: URL must be a TradingView URL")
         sys.exit(1)
     
     headless = not args.visible
     
+    if args.fast and not disable_stack_capture():
+        print("Note: --fast not supported by this Playwright version, ignoring")
+    
     scraper = TradingViewScraper(
         output_dir=args.output,
-        headless=headless
+        headless=headless,
+        concurrency=args.concurrency,
+        retries=args.retries,
+        backoff=args.backoff
     )
     
     await scraper.download_scripts(